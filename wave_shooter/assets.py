@@ -0,0 +1,107 @@
+import pygame
+import os
+from concurrent.futures import ThreadPoolExecutor
+from settings import *
+from render_queue import Atlas
+
+# Shared by every sprite, so each image is only loaded and scaled once
+_images = {}
+_animations = {}
+_sounds = {}
+_atlases = {}
+# Files being decoded on the loader thread, by path
+_pending = {}
+_loader = None
+
+def _submit(paths, load):
+    global _loader
+    if _loader is None:
+        _loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="assets")
+    for path in paths:
+        if path not in _pending:
+            _pending[path] = _loader.submit(load, path)
+
+def preload(paths):
+    # Decode images in the background, in order. Converting to the display format has to
+    # happen on the main thread, load_image does that when the image is first asked for
+    _submit(paths, pygame.image.load)
+
+def preload_sounds(paths):
+    _submit(paths, pygame.mixer.Sound)
+
+def is_loaded(paths):
+    return all(path not in _pending or _pending[path].done() for path in paths)
+
+def _take(path, load):
+    # Only blocks if the loader thread has not got to this file yet
+    future = _pending.pop(path, None)
+    return future.result() if future else load(path)
+
+def load_image(path, size=None):
+    key = (path, size)
+    if key not in _images:
+        img = _take(path, pygame.image.load).convert_alpha()
+        if size:
+            img = pygame.transform.scale(img, size)
+        _images[key] = img
+    return _images[key]
+
+def load_animations(name, scale=1.5, flipped=False):
+    key = (name, scale, flipped)
+    if key not in _animations and flipped:
+        # Mirrored frames for left facing sprites, built once from the originals
+        animations = load_animations(name, scale)
+        _animations[key] = {animation: [pygame.transform.flip(img, True, False) for img in frames]
+                            for animation, frames in animations.items()}
+    if key not in _animations:
+        animations = {}
+        for animation in ["Idle", "Run", "Jump", "Death"]:
+            temp_list = []
+            paths = animation_paths(name, animation)
+            if not paths:
+                continue
+
+            for path in paths:
+                img = _take(path, pygame.image.load).convert_alpha()
+                img = pygame.transform.scale(img, (int(img.get_width() * scale),
+                                                   int(img.get_height() * scale)))
+                temp_list.append(img)
+
+            animations[animation] = temp_list
+        _animations[key] = animations
+    return _animations[key]
+
+def animation_paths(name, animation=None):
+    # Frame files of one animation, or of all of them
+    if animation is None:
+        return [path for animation in ["Idle", "Run", "Jump", "Death"] for path in animation_paths(name, animation)]
+    path = f"Assets/img/{name}/{animation}"
+    if not os.path.exists(path):
+        return []
+    return [f"{path}/{i}.png" for i in range(len(os.listdir(path)))]
+
+def load_sound(path):
+    # None if the sound could not be loaded, e.g. no audio device
+    if path not in _sounds:
+        try:
+            _sounds[path] = _take(path, pygame.mixer.Sound)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error loading audio: {e}")
+            _sounds[path] = None
+    return _sounds[path]
+
+def animation_frames(names):
+    # Every animation frame of each set, normal then flipped, always in the same order
+    images = []
+    for name in names:
+        for flipped in (False, True):
+            for frames in load_animations(name, flipped=flipped).values():
+                images += frames
+    return images
+
+def load_atlas(names):
+    # All the animation frames of the named sets packed into one surface
+    key = tuple(names)
+    if key not in _atlases:
+        _atlases[key] = Atlas(animation_frames(names))
+    return _atlases[key]
@@ -0,0 +1,47 @@
+import pygame
+import numpy as np
+from settings import *
+
+COLORKEY = (255, 0, 255)
+
+class ParallaxBackground:
+    def __init__(self, bg_color, layers):
+        # layers: (image, y, scroll factor) from back to front, all tiling horizontally.
+        # Each one is pre-composited into a strip one screen wider than the image so any
+        # scroll position is a single blit of a WIDTH wide slice
+        self.layers = []
+        for i, (image, y, factor) in enumerate(layers):
+            width = image.get_width()
+            copies = -(-WIDTH // width) + 1
+            if i == 0:
+                # The back layer and the fill colour make one opaque full screen strip
+                strip = pygame.Surface((width * copies, HEIGHT)).convert()
+                strip.fill(bg_color)
+                for x in range(copies):
+                    strip.blit(image, (x * width, y))
+                y = 0
+            else:
+                strip = pygame.Surface((width * copies, image.get_height()), pygame.SRCALPHA)
+                for x in range(copies):
+                    strip.blit(image, (x * width, 0))
+                strip = self.flatten(strip)
+            self.layers.append((strip, width, y, factor))
+
+    def flatten(self, strip):
+        # Fully transparent or fully opaque pixels only, a colorkey blit is much cheaper than alpha
+        alpha = pygame.surfarray.array_alpha(strip)
+        colors = pygame.surfarray.array3d(strip)
+        opaque = alpha == 255
+        key_used = np.any(opaque & np.all(colors == COLORKEY, axis=2))
+        if np.any((alpha > 0) & ~opaque) or key_used:
+            return strip.convert_alpha()
+        flat = pygame.Surface(strip.get_size()).convert()
+        flat.fill(COLORKEY)
+        flat.blit(strip, (0, 0))
+        flat.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        return flat
+
+    def draw(self, surface, scroll):
+        for strip, width, y, factor in self.layers:
+            offset = int(scroll * factor) % width
+            surface.blit(strip, (0, y), (offset, 0, WIDTH, strip.get_height()))
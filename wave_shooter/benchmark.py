@@ -0,0 +1,181 @@
+import pygame
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from settings import *
+from headless import init_headless, scripted_input, idle_input
+from game import GameSession, PLAYING
+from profiler import Profiler
+from replay import load_replay
+
+try:
+    import resource
+except ImportError:
+    # Unix only, peak RSS is left out on Windows
+    resource = None
+
+def make_stress_level(cols=150, enemies=0, seed=0):
+    # Flat ground with scattered platforms, enemies spread evenly along it
+    rng = random.Random(seed)
+    data = [[-1] * cols for _ in range(16)]
+    for x in range(cols):
+        data[14][x] = 0
+        data[15][x] = 4
+    for x in range(10, cols - 10, 12):
+        y = rng.randint(8, 11)
+        for i in range(rng.randint(3, 6)):
+            data[y][x + i] = 0
+
+    data[13][2] = 15
+    if enemies:
+        spacing = max((cols - 10) / enemies, 1)
+        for i in range(enemies):
+            x = min(int(10 + i * spacing), cols - 1)
+            data[13][x] = 16
+    return data
+
+def playthrough_input(tick, session):
+    # Keep going after a death so every run covers the full tick count
+    controls = scripted_input(tick, session)
+    controls.restart = True
+    return controls
+
+SCENARIOS = {
+    "level1": {"level_path": "Assets/level1_data.csv"},
+    "level2": {"level_path": "Assets/level2_data.csv"},
+    "level3": {"level_path": "Assets/level3_data.csv"},
+    "level1_idle": {"level_path": "Assets/level1_data.csv", "script": idle_input},
+    "many_enemies": {"world_data": lambda: make_stress_level(cols=300, enemies=400)},
+    "long_map": {"world_data": lambda: make_stress_level(cols=3000, enemies=200)},
+    "long_map_streaming": {"world_data": lambda: make_stress_level(cols=3000, enemies=200), "streaming": True},
+    "endless": {"level_path": None, "streaming": True},
+    "waves": {"level_path": "Assets/level1_data.csv", "waves": True},
+}
+
+def build_session(scenario, profiler=None, seed=0):
+    config = SCENARIOS[scenario]
+    world_data = config["world_data"]() if "world_data" in config else None
+    return GameSession(config.get("level_path"), state=PLAYING, profiler=profiler, world_data=world_data,
+                       streaming=config.get("streaming", False), seed=seed, waves=config.get("waves", False))
+
+def peak_rss_kb():
+    # Whole process, so SDL surfaces and numpy buffers count as well as Python objects
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 1024 if sys.platform == "darwin" else peak
+
+def run_scenario(scenario, ticks, seed=0, draw=True):
+    init_headless()
+    if scenario in SCENARIOS:
+        script = SCENARIOS[scenario].get("script", playthrough_input)
+        build = lambda profiler=None: build_session(scenario, profiler, seed)
+    else:
+        # Anything else is a replay file, played back for as many of its ticks as asked for
+        replay = load_replay(scenario)
+        script = replay.input
+        build = replay.session
+        ticks = min(ticks, len(replay))
+    screen = pygame.Surface((WIDTH, HEIGHT)) if draw else None
+
+    # Timed pass
+    profiler = Profiler(size=ticks)
+    session = build(profiler)
+    start = time.perf_counter()
+    while session.tick < ticks:
+        profiler.begin_frame()
+        session.step(script(session.tick, session))
+        if screen:
+            session.draw(screen)
+        profiler.end_frame(**session.counts())
+    elapsed = time.perf_counter() - start
+    # Only meaningful in a fresh process, see run_isolated
+    peak_rss = peak_rss_kb()
+
+    # Python heap pass, tracemalloc slows everything down so it is kept out of the timings
+    del session
+    tracemalloc.start()
+    session = build()
+    while session.tick < ticks:
+        session.step(script(session.tick, session))
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    summary = profiler.summary()
+    result = {
+        "ticks": ticks,
+        "fps": ticks / elapsed,
+        "frame_p50": summary["frame_p50"],
+        "frame_p99": summary["frame_p99"],
+        "peak_rss_kb": peak_rss,
+        "python_heap_kb": python_peak / 1024,
+        "stages": {name: summary[name] for name in profiler.stages},
+    }
+    return result
+
+def run_isolated(scenario, ticks, seed=0, draw=True):
+    # A fresh process per scenario, so the peak RSS is this scenario's alone
+    context = multiprocessing.get_context("spawn")
+    os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_scenario, scenario, ticks, seed, draw).result()
+
+def compare(results, baseline, threshold):
+    # Lower fps or higher median frame time / memory than the baseline by more than threshold
+    # is a regression, p99 is too noisy to gate on so it is only reported
+    regressions = []
+    for scenario, result in results.items():
+        if scenario not in baseline:
+            continue
+        base = baseline[scenario]
+        checks = [("fps", -1), ("frame_p50", 1), ("frame_p99", 0), ("peak_rss_kb", 1),
+                  ("python_heap_kb", 1)]
+        for key, sign in checks:
+            if not base.get(key) or not result.get(key):
+                continue
+            change = (result[key] - base[key]) / base[key]
+            marker = ""
+            if change * sign > threshold:
+                marker = "  REGRESSION"
+                regressions.append((scenario, key))
+            print(f"  {scenario:20} {key:15} {base[key]:10.2f} -> {result[key]:10.2f} ({change:+.1%}){marker}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Wave Shooter game loop")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help="scenario names or replay files")
+    parser.add_argument("--ticks", type=int, default=FPS * 20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-draw", action="store_true", help="only time the simulation")
+    parser.add_argument("--baseline", default="benchmark_baseline.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = {}
+    for scenario in args.scenarios:
+        result = run_isolated(scenario, args.ticks, args.seed, draw=not args.no_draw)
+        results[scenario] = result
+        rss = f"{result['peak_rss_kb'] / 1024:.0f}MB" if result["peak_rss_kb"] else "n/a"
+        print(f"{scenario:20} {result['fps']:8.0f} fps  p50 {result['frame_p50']:.3f}ms  "
+              f"p99 {result['frame_p99']:.3f}ms  peak rss {rss}  python heap {result['python_heap_kb']:.0f}KB")
+        for name, ms in result["stages"].items():
+            print(f"    {name:16} {ms:.4f}ms")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as jsonfile:
+            json.dump(results, jsonfile, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as jsonfile:
+            baseline = json.load(jsonfile)
+        print(f"Compared with {args.baseline}:")
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
@@ -1,20 +1,98 @@
 import pygame
+import numpy as np
 from settings import *
+from collision import box_hits
 
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction):
-        super().__init__()
-        self.speed = BULLET_SPEED
-        self.image = pygame.Surface((10, 5))
+BULLET_WIDTH = 10
+BULLET_HEIGHT = 5
+
+class BulletPool:
+    def __init__(self, capacity=128):
+        # One shared image, per bullet state lives in flat arrays
+        self.image = pygame.Surface((BULLET_WIDTH, BULLET_HEIGHT))
         self.image.fill((255, 255, 0)) # Yellow bullet
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
-        self.direction = direction
-
-    def update(self, screen_scroll):
-        # Move bullet
-        self.rect.x += (self.direction * self.speed) + screen_scroll
-        
-        # Check if bullet has gone off screen
-        if self.rect.right < 0 or self.rect.left > WIDTH:
-            self.kill()
+        self.speed = BULLET_SPEED
+        self.allocate(capacity)
+
+    def allocate(self, capacity):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.prev_x = np.zeros(capacity, dtype=np.int32)
+        self.direction = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.free = list(range(capacity - 1, -1, -1))
+
+    def grow(self):
+        old = (self.x, self.y, self.prev_x, self.direction, self.alive)
+        size = self.capacity
+        self.allocate(size * 2)
+        for new, values in zip((self.x, self.y, self.prev_x, self.direction, self.alive), old):
+            new[:size] = values
+        # Everything below the old capacity was in use, the new half is free
+        self.free = list(range(self.capacity - 1, size - 1, -1))
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+
+    def __len__(self):
+        return self.capacity - len(self.free)
+
+    def spawn(self, x, y, direction):
+        if not self.free:
+            self.grow()
+        i = self.free.pop()
+        # Same placement as setting rect.center on a new sprite
+        self.x[i] = self.prev_x[i] = int(x) - BULLET_WIDTH // 2
+        self.y[i] = int(y) - BULLET_HEIGHT // 2
+        self.direction[i] = direction
+        self.alive[i] = True
+
+    def kill(self, mask):
+        mask &= self.alive
+        self.alive[mask] = False
+        self.direction[mask] = 0
+        self.free.extend(np.flatnonzero(mask).tolist())
+
+    def rect(self, i):
+        return pygame.Rect(int(self.x[i]), int(self.y[i]), BULLET_WIDTH, BULLET_HEIGHT)
+
+    def update(self, camera):
+        if not len(self):
+            return
+        # Move every bullet in one step
+        self.prev_x[:] = self.x
+        self.x += self.direction * self.speed
+
+        # Check if bullets have gone off screen
+        self.kill((self.x + BULLET_WIDTH <= camera.scroll) | (self.x >= camera.scroll + camera.width))
+
+    def collide_rects(self, rects):
+        # Kill every bullet overlapping any of rects, returns the (bullet, rect) hit pairs
+        if not len(self) or not rects:
+            return [], []
+        alive = np.flatnonzero(self.alive)
+        bullet_ids, rect_ids = box_hits(self.x[alive], self.y[alive], BULLET_WIDTH, BULLET_HEIGHT, rects)
+        bullet_ids = alive[bullet_ids]
+        if len(bullet_ids):
+            hits = np.zeros(self.capacity, dtype=bool)
+            hits[bullet_ids] = True
+            self.kill(hits)
+        return bullet_ids.tolist(), rect_ids.tolist()
+
+    def collide_tiles(self, collision):
+        if not len(self):
+            return
+        alive = np.flatnonzero(self.alive)
+        hits = np.zeros(self.capacity, dtype=bool)
+        hits[alive] = collision.collide_boxes(self.x[alive], self.y[alive], BULLET_WIDTH, BULLET_HEIGHT)
+        self.kill(hits)
+
+    def draw(self, queue, camera, layer="bullets", alpha=1.0):
+        if not len(self):
+            return
+        alive = np.flatnonzero(self.alive)
+        x = np.round(self.prev_x[alive] + (self.x[alive] - self.prev_x[alive]) * alpha).astype(np.int32)
+        x -= camera.offset(alpha)
+        queue.extend(layer, self.image, zip(x.tolist(), self.y[alive].tolist()))
@@ -0,0 +1,37 @@
+from settings import *
+
+class Camera:
+    def __init__(self, width=WIDTH):
+        self.width = width
+        # World x coordinate of the left edge of the screen
+        self.scroll = 0
+        self.prev_scroll = 0
+
+    def reset(self):
+        self.scroll = 0
+        self.prev_scroll = 0
+
+    def begin_tick(self):
+        self.prev_scroll = self.scroll
+
+    def follow(self, rect, dx):
+        # Scroll with the target once it walks past the scroll threshold
+        if rect.right - self.scroll > self.width - SCROLL_THRESH or rect.left - self.scroll < SCROLL_THRESH:
+            self.scroll += dx
+
+    def offset(self, alpha=1.0):
+        # Scroll position between the last two ticks, used for rendering
+        return round(self.prev_scroll + (self.scroll - self.prev_scroll) * alpha)
+
+    def is_visible(self, rect, margin=0):
+        return rect.right > self.scroll - margin and rect.left < self.scroll + self.width + margin
+
+    def draw(self, queue, group, layer="sprites", alpha=1.0):
+        # Queues the visible sprites of group, interpolated between the last two ticks
+        offset = self.offset(alpha)
+        for sprite in group:
+            if self.is_visible(sprite.rect):
+                x, y = sprite.rect.topleft
+                prev_x, prev_y = getattr(sprite, "prev_pos", (x, y))
+                queue.add(layer, sprite.image, (round(prev_x + (x - prev_x) * alpha) - offset,
+                                                round(prev_y + (y - prev_y) * alpha)))
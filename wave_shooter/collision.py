@@ -0,0 +1,98 @@
+import numpy as np
+from settings import *
+
+class TileGrid:
+    def __init__(self, rows, cols=None):
+        self.rows = rows
+        # None for levels that keep streaming in new columns
+        self.cols = cols
+        # Cells and the solid tile bitmap are stored per chunk of CHUNK_TILES columns,
+        # so streamed levels can add and drop them as the camera moves
+        self.cells = {}
+        self.solid = {}
+
+    def add_chunk(self, chunk):
+        self.cells[chunk] = [[None] * CHUNK_TILES for _ in range(self.rows)]
+        self.solid[chunk] = np.zeros((self.rows, CHUNK_TILES), dtype=bool)
+
+    def remove_chunk(self, chunk):
+        self.cells.pop(chunk, None)
+        self.solid.pop(chunk, None)
+
+    def add(self, row, col, tile_data):
+        chunk, x = divmod(col, CHUNK_TILES)
+        if chunk not in self.cells:
+            self.add_chunk(chunk)
+        self.cells[chunk][row][x] = tile_data
+        self.solid[chunk][row, x] = True
+
+    def tile_at(self, row, col):
+        chunk, x = divmod(col, CHUNK_TILES)
+        cells = self.cells.get(chunk)
+        if cells is None or not 0 <= row < self.rows:
+            return None
+        return cells[row][x]
+
+    def cell_range(self, rect):
+        # Only look at the cells the rect actually touches
+        col_start = max(rect.left // TILE_SIZE, 0)
+        col_end = (rect.right - 1) // TILE_SIZE
+        if self.cols is not None:
+            col_end = min(col_end, self.cols - 1)
+        row_start = max(rect.top // TILE_SIZE, 0)
+        row_end = min((rect.bottom - 1) // TILE_SIZE, self.rows - 1)
+        return row_start, row_end, col_start, col_end
+
+    def collide(self, rect):
+        hits = []
+        row_start, row_end, col_start, col_end = self.cell_range(rect)
+        for row in range(row_start, row_end + 1):
+            for col in range(col_start, col_end + 1):
+                tile = self.tile_at(row, col)
+                if tile and tile[1].colliderect(rect):
+                    hits.append(tile[1])
+        return hits
+
+    def collides(self, rect):
+        row_start, row_end, col_start, col_end = self.cell_range(rect)
+        for row in range(row_start, row_end + 1):
+            for col in range(col_start, col_end + 1):
+                tile = self.tile_at(row, col)
+                if tile and tile[1].colliderect(rect):
+                    return True
+        return False
+
+    def solid_at(self, rows, cols):
+        # Vectorised cell lookup, anything outside the loaded level is empty
+        result = np.zeros(len(rows), dtype=bool)
+        chunks = cols // CHUNK_TILES
+        inside = (rows >= 0) & (rows < self.rows)
+        for chunk in np.unique(chunks[inside]).tolist():
+            solid = self.solid.get(chunk)
+            if solid is None:
+                continue
+            mask = inside & (chunks == chunk)
+            result[mask] = solid[rows[mask], cols[mask] - chunk * CHUNK_TILES]
+        return result
+
+    def collide_boxes(self, x, y, width, height):
+        # Which of many same sized boxes (no bigger than a tile) touch a solid tile
+        left = x // TILE_SIZE
+        right = (x + width - 1) // TILE_SIZE
+        top = y // TILE_SIZE
+        bottom = (y + height - 1) // TILE_SIZE
+        return (self.solid_at(top, left) | self.solid_at(top, right)
+                | self.solid_at(bottom, left) | self.solid_at(bottom, right))
+
+def box_hits(x, y, width, height, rects):
+    # Every (box, rect) pair that overlaps, checked in one broadcast
+    if not len(x) or not len(rects):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    rects = np.asarray(rects, dtype=np.int32).reshape(-1, 4)
+    left = rects[:, 0]
+    top = rects[:, 1]
+    right = left + rects[:, 2]
+    bottom = top + rects[:, 3]
+    overlap = ((x[:, None] < right) & (x[:, None] + width > left)
+               & (y[:, None] < bottom) & (y[:, None] + height > top))
+    return np.nonzero(overlap)
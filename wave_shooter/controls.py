@@ -0,0 +1,35 @@
+import pygame
+
+class Controls:
+    # Order of the flags when packed into one byte per tick for replays
+    FIELDS = ("left", "right", "jump", "shoot", "start", "restart")
+
+    def __init__(self, left=False, right=False, jump=False, shoot=False, start=False, restart=False):
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.shoot = shoot
+        self.start = start
+        self.restart = restart
+
+    @classmethod
+    def from_keyboard(cls, shoot=False):
+        # Shooting is edge triggered from KEYDOWN events, everything else is held
+        keys = pygame.key.get_pressed()
+        return cls(left=keys[pygame.K_a],
+                   right=keys[pygame.K_d],
+                   jump=keys[pygame.K_w],
+                   shoot=shoot,
+                   start=keys[pygame.K_SPACE],
+                   restart=keys[pygame.K_r])
+
+    def pack(self):
+        bits = 0
+        for i, field in enumerate(self.FIELDS):
+            if getattr(self, field):
+                bits |= 1 << i
+        return bits
+
+    @classmethod
+    def unpack(cls, bits):
+        return cls(*(bool(bits >> i & 1) for i in range(len(cls.FIELDS))))
@@ -1,86 +1,76 @@
-import pygame
-import os
 import random
 from settings import *
+from assets import load_animations
+from entities import Entity
+
+class Enemy(Entity):
+    __slots__ = ("animations", "flipped_animations", "pool", "rng", "spawn", "action", "frame_index", "image", "rect",
+                 "prev_pos", "flip", "vel_y", "direction", "speed", "shoot_cooldown", "alive", "move_counter",
+                 "idling", "idling_counter", "animation_timer")
 
-class Enemy(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
 
-        self.animations = {}
-        self.load_animations()
+        self.animations = load_animations("enemy")
+        self.flipped_animations = load_animations("enemy", flipped=True)
+
+        self.pool = None
+        # The session's random generator when pooled, so runs can be replayed exactly
+        self.rng = random
+        self.reset(x, y)
 
+    def reset(self, x, y):
+        # Back to a fresh enemy at (x, y), used when the pool hands out a recycled one
+        # The level spawn point it came from, if any
+        self.spawn = None
         self.action = "Idle"
         self.frame_index = 0
         self.image = self.animations[self.action][self.frame_index]
-        self.rect = self.image.get_rect()
-        self.rect.topleft = (x, y)
+        self.rect = self.image.get_rect(topleft=(x, y))
+        self.prev_pos = self.rect.topleft
 
         self.flip = False
         self.vel_y = 0
         self.direction = 1
         self.speed = 2
-        
+
         self.shoot_cooldown = 0
         self.alive = True
-        self.update_time = pygame.time.get_ticks()
         self.move_counter = 0
         self.idling = False
         self.idling_counter = 0
-        self.update_time = pygame.time.get_ticks()
-
-    def load_animations(self):
-        animation_types = ["Idle", "Run", "Jump", "Death"]
-
-        for animation in animation_types:
-            temp_list = []
-            path = f"Assets/img/enemy/{animation}"
-            if not os.path.exists(path):
-                continue
-            frames = len(os.listdir(path))
-
-            for i in range(frames):
-                img = pygame.image.load(f"{path}/{i}.png").convert_alpha()
-                img = pygame.transform.scale(img, (int(img.get_width() * 1.5),
-                                                   int(img.get_height() * 1.5)))
-                temp_list.append(img)
+        self.animation_timer = 0
 
-            self.animations[animation] = temp_list
+    def despawn(self):
+        # Leave the game, going back to the pool if it came from one
+        if self.groups():
+            self.kill()
+            if self.pool is not None:
+                self.pool.release(self)
 
-    def update(self, screen_scroll, obstacle_list, player, enemy_bullet_group, bullet_class):
+    def update(self, world, sight, enemy_bullets):
         self.update_animation()
         if self.alive:
             if self.shoot_cooldown > 0:
                 self.shoot_cooldown -= 1
-            self.move(obstacle_list, player, enemy_bullet_group, bullet_class)
-            self.rect.x += screen_scroll
+            self.move(world, sight, enemy_bullets)
         else:
-            self.rect.x += screen_scroll
             if self.frame_index >= len(self.animations["Death"]) - 1:
-                self.kill()
+                self.despawn()
 
-    def move(self, obstacle_list, player, enemy_bullet_group, bullet_class):
+    def move(self, world, sight, enemy_bullets):
         dx = 0
-        dy = 0
 
         # Vision check
-        vision_rect = pygame.Rect(0, 0, 150, 20)
-        vision_rect.center = self.rect.center
-        if self.direction == 1:
-            vision_rect.left = self.rect.right
-        else:
-            vision_rect.right = self.rect.left
-
-        if vision_rect.colliderect(player.rect) and player.alive:
+        if sight.can_see(self.rect, self.direction):
             self.idling = True
             self.idling_counter = 20
             # Shoot
             if self.shoot_cooldown == 0:
                 self.shoot_cooldown = 40
-                bullet = bullet_class(self.rect.centerx + (0.8 * self.rect.size[0] * self.direction),
-                                      self.rect.centery,
-                                      self.direction)
-                enemy_bullet_group.add(bullet)
+                enemy_bullets.spawn(self.rect.centerx + (0.8 * self.rect.size[0] * self.direction),
+                                    self.rect.centery,
+                                    self.direction)
 
         if not self.idling:
             dx = self.speed * self.direction
@@ -89,12 +79,49 @@ class Enemy(pygame.sprite.Sprite):
                 self.direction *= -1
                 self.move_counter *= -1
                 self.idling = True
-                self.idling_counter = random.randint(30, 90)
+                self.idling_counter = self.rng.randint(30, 90)
         else:
             self.idling_counter -= 1
             if self.idling_counter <= 0:
                 self.idling = False
 
+        # Walking along a span from the nav map needs no collision probing, it already knows
+        # where the walls and ledges are and that the ground is right underneath
+        span = world.nav.ground_span(self.rect)
+        if span is not None:
+            left, right = span
+            self.vel_y = 0
+            self.rect.x += dx
+            if self.rect.right > right:
+                self.rect.right = right
+                self.direction = -1
+                self.move_counter = 0
+                dx = 0
+            elif self.rect.left < left:
+                self.rect.left = left
+                self.direction = 1
+                self.move_counter = 0
+                dx = 0
+        else:
+            dx = self.fall(world.collision, dx)
+
+        # Direction flip
+        if self.direction == 1:
+            self.flip = False
+        else:
+            self.flip = True
+
+        # Animation switching
+        if dx != 0:
+            self.update_action("Run")
+        else:
+            self.update_action("Idle")
+
+    def fall(self, collision, dx):
+        # In the air or somewhere the nav map does not cover, move and resolve collisions
+        # the slow way. Returns dx, zeroed if a wall was hit
+        dy = 0
+
         # Gravity
         self.vel_y += GRAVITY
         if self.vel_y > 10:
@@ -104,57 +131,49 @@ class Enemy(pygame.sprite.Sprite):
         # Collision with environment
         # Check for collision in x direction
         self.rect.x += dx
-        for tile in obstacle_list:
-            if tile[1].colliderect(self.rect):
+        for tile in collision.collide(self.rect):
+            if tile.colliderect(self.rect):
                 if dx > 0:
-                    self.rect.right = tile[1].left
+                    self.rect.right = tile.left
                     self.direction = -1
                     self.move_counter = 0
                 elif dx < 0:
-                    self.rect.left = tile[1].right
+                    self.rect.left = tile.right
                     self.direction = 1
                     self.move_counter = 0
                 dx = 0
 
         # Check for collision in y direction
         self.rect.y += dy
-        for tile in obstacle_list:
-            if tile[1].colliderect(self.rect):
+        for tile in collision.collide(self.rect):
+            if tile.colliderect(self.rect):
                 # Check if below the ground (jumping)
                 if self.vel_y < 0:
                     self.vel_y = 0
-                    self.rect.top = tile[1].bottom
+                    self.rect.top = tile.bottom
                     dy = 0
                 # Check if above the ground (falling)
                 elif self.vel_y >= 0:
                     self.vel_y = 0
-                    self.rect.bottom = tile[1].top
+                    self.rect.bottom = tile.top
                     dy = 0
 
-        # Direction flip
-        if self.direction == 1:
-            self.flip = False
-        else:
-            self.flip = True
-
-        # Animation switching
-        if dx != 0:
-            self.update_action("Run")
-        else:
-            self.update_action("Idle")
+        return dx
 
     def update_animation(self):
         # Update animation
-        ANIMATION_COOLDOWN = 100
+        ANIMATION_COOLDOWN = 6 # ticks
         # Update image depending on current frame
         if self.action in self.animations and len(self.animations[self.action]) > 0:
-            self.image = self.animations[self.action][self.frame_index]
             if self.flip:
-                self.image = pygame.transform.flip(self.image, True, False)
-
-            # Check if enough time has passed since the last update
-            if pygame.time.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
-                self.update_time = pygame.time.get_ticks()
+                self.image = self.flipped_animations[self.action][self.frame_index]
+            else:
+                self.image = self.animations[self.action][self.frame_index]
+
+            # Check if enough ticks have passed since the last update
+            self.animation_timer += 1
+            if self.animation_timer > ANIMATION_COOLDOWN:
+                self.animation_timer = 0
                 self.frame_index += 1
 
             # If the animation has run out then reset back to the start
@@ -165,3 +184,36 @@ class Enemy(pygame.sprite.Sprite):
         if new_action != self.action and new_action in self.animations:
             self.action = new_action
             self.frame_index = 0
+
+class EnemyPool:
+    __slots__ = ("free", "rng")
+
+    def __init__(self, rng=random):
+        # Dead and despawned enemies wait here to be reused instead of being rebuilt
+        self.free = []
+        self.rng = rng
+
+    def make(self, x, y):
+        enemy = Enemy(x, y)
+        enemy.pool = self
+        enemy.rng = self.rng
+        return enemy
+
+    def __len__(self):
+        return len(self.free)
+
+    def reserve(self, count):
+        # Allocate ahead of time so a wave does not build enemies in the middle of a fight
+        for i in range(count - len(self.free)):
+            self.free.append(self.make(0, 0))
+
+    def acquire(self, x, y):
+        if self.free:
+            enemy = self.free.pop()
+            enemy.reset(x, y)
+        else:
+            enemy = self.make(x, y)
+        return enemy
+
+    def release(self, enemy):
+        self.free.append(enemy)
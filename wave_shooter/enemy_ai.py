@@ -0,0 +1,62 @@
+import numpy as np
+from settings import *
+
+# Level of detail tiers, by horizontal distance from the edge of the view
+ACTIVE = 0
+REDUCED = 1
+ASLEEP = 2
+
+class EnemyScheduler:
+    def __init__(self, group, active_margin=SCROLL_THRESH, reduced_margin=WIDTH, reduced_rate=8,
+                 retier_interval=8):
+        # Active enemies update every tick. Reduced ones are split into reduced_rate batches
+        # and one batch updates per tick, so they carry on patrolling at a fraction of the
+        # speed where nobody can see them. Asleep ones are not touched until the view gets close
+        self.group = group
+        self.active_margin = active_margin
+        self.reduced_margin = reduced_margin
+        self.reduced_rate = reduced_rate
+        # The view moves a few pixels a tick, so tiers only need working out every few ticks
+        self.retier_interval = retier_interval
+        self.active = []
+        self.reduced = []
+        self.asleep = 0
+        self.tick = 0
+        self.dirty = True
+
+    def invalidate(self):
+        # Enemies were added or removed, work the tiers out again on the next update
+        self.dirty = True
+
+    def retier(self, camera):
+        enemies = self.group.sprites()
+        x = np.fromiter((enemy.rect.centerx for enemy in enemies), dtype=np.int32, count=len(enemies))
+        distance = np.maximum(camera.scroll - x, x - (camera.scroll + camera.width))
+
+        # Dying enemies stay active so their death animation plays out
+        dying = np.fromiter((not enemy.alive for enemy in enemies), dtype=bool, count=len(enemies))
+        tier = np.full(len(enemies), ASLEEP, dtype=np.int8)
+        tier[distance <= self.reduced_margin] = REDUCED
+        tier[(distance <= self.active_margin) | dying] = ACTIVE
+
+        self.active = [enemies[i] for i in np.flatnonzero(tier == ACTIVE)]
+        self.reduced = [enemies[i] for i in np.flatnonzero(tier == REDUCED)]
+        self.asleep = len(enemies) - len(self.active) - len(self.reduced)
+        self.dirty = False
+
+    def update(self, camera, world, sight, enemy_bullets):
+        self.tick += 1
+        if self.dirty or self.tick % self.retier_interval == 0:
+            self.retier(camera)
+
+        batch = self.reduced[self.tick % self.reduced_rate::self.reduced_rate]
+        for enemies in (self.active, batch):
+            for enemy in enemies:
+                enemy.prev_pos = enemy.rect.topleft
+                enemy.update(world, sight, enemy_bullets)
+                if not enemy.alive and not enemy.groups():
+                    # Death animation finished and the enemy removed itself
+                    self.dirty = True
+
+    def counts(self):
+        return {"active": len(self.active), "reduced": len(self.reduced), "asleep": self.asleep}
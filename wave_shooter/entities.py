@@ -0,0 +1,53 @@
+class Entity:
+    # Slotted stand-in for pygame.sprite.Sprite: no per instance dict, and the one group
+    # an entity can be in is a plain reference instead of a set
+    __slots__ = ("group",)
+
+    def __init__(self):
+        self.group = None
+
+    def groups(self):
+        return [self.group] if self.group is not None else []
+
+    def kill(self):
+        if self.group is not None:
+            self.group.remove(self)
+
+class EntityGroup:
+    # The parts of pygame.sprite.Group the game uses. Camera.draw only needs image, rect and
+    # prev_pos from what it iterates, so entities draw without being sprites
+    def __init__(self):
+        # Insertion ordered, so iteration order is the same on every run
+        self.entities = {}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        # A copy, entities can leave the group while it is being iterated
+        return iter(list(self.entities))
+
+    def __contains__(self, entity):
+        return entity in self.entities
+
+    def sprites(self):
+        return list(self.entities)
+
+    def add(self, entity):
+        if entity.group is not None:
+            entity.group.remove(entity)
+        entity.group = self
+        self.entities[entity] = None
+
+    def remove(self, entity):
+        if self.entities.pop(entity, False) is None:
+            entity.group = None
+
+    def empty(self):
+        for entity in self.entities:
+            entity.group = None
+        self.entities.clear()
+
+    def update(self, *args):
+        for entity in self:
+            entity.update(*args)
@@ -0,0 +1,233 @@
+import random
+from settings import *
+from player import Player
+from enemy import EnemyPool
+from enemy_ai import EnemyScheduler
+from bullet import BulletPool
+from level import Level, World
+from level_file import load_level, compile_level
+from procedural import ProceduralLevel
+from camera import Camera
+from entities import EntityGroup
+from sight import LineOfSight
+from render_queue import RenderQueue
+from assets import load_atlas
+from waves import WaveDirector
+from profiler import NullProfiler
+
+# Game states
+MENU = 0
+PLAYING = 1
+GAME_OVER = 2
+
+class GameSession:
+    def __init__(self, level_path="Assets/level1_data.csv", state=MENU, profiler=None, world_data=None,
+                 streaming=False, seed=0, waves=False):
+        self.camera = Camera()
+        # Everything random in the simulation draws from here, so a seed and the inputs
+        # are enough to reproduce a run
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.level_path = level_path
+        self.world_data = world_data
+        self.streaming = streaming
+        self.profiler = profiler or NullProfiler()
+
+        # Sprite groups
+        self.player_group = EntityGroup()
+        self.enemy_group = EntityGroup()
+        self.enemy_ai = EnemyScheduler(self.enemy_group)
+        self.sight = LineOfSight()
+        self.enemy_pool = EnemyPool(self.rng)
+        # Escalating waves on top of the enemies placed in the level
+        self.waves = WaveDirector(rng=self.rng) if waves else None
+        self.bullets = BulletPool()
+        self.enemy_bullets = BulletPool()
+
+        # Load level, unless the tile grid was handed over directly
+        if world_data is not None:
+            self.level_data = compile_level(world_data)
+        elif level_path is not None:
+            self.level_data = load_level(level_path)
+        else:
+            # No level at all streams an endless generated one
+            self.level_data = ProceduralLevel(seed)
+            streaming = self.streaming = True
+
+        self.level = Level()
+        self.world = World()
+        if streaming:
+            self.world.stream(self.level_data, self.level.tiles)
+        else:
+            self.world.process_data(self.level_data, self.level.tiles)
+
+        # Sprite frames come from one atlas and go out in a Surface.blits call per layer
+        self.render_queue = RenderQueue(load_atlas(("player", "enemy")))
+
+        self.state = state
+        self.tick = 0
+        # Sounds triggered during the last step, played by whoever owns the audio
+        self.events = []
+        self.reset_level()
+
+    def reset_level(self):
+        self.camera.reset()
+        self.kills = 0
+        self.player_group.empty()
+        for enemy in self.enemy_group.sprites():
+            enemy.despawn()
+        # Nothing may be spawned below, the scheduler still has to forget the old enemies
+        self.enemy_ai.invalidate()
+        if self.waves:
+            self.waves.reset()
+        self.bullets.clear()
+        self.enemy_bullets.clear()
+
+        # Spawn objects from the level's spawn tables
+        if self.world.streaming:
+            self.world.clear_chunks()
+            spawns, _ = self.world.update_streaming(self.camera)
+        else:
+            spawns = self.world.enemy_spawns
+        for x, y in spawns:
+            self.spawn_enemy(x, y).spawn = (x, y)
+
+        # Fallback if no player spawned
+        if self.world.player_spawn:
+            self.player = Player(*self.world.player_spawn)
+        else:
+            self.player = Player(200, HEIGHT - 100)
+        self.player_group.add(self.player)
+
+    def step(self, controls):
+        # One fixed simulation tick
+        self.events = []
+        self.tick += 1
+
+        if self.state == MENU:
+            if controls.start:
+                self.state = PLAYING
+
+        elif self.state == PLAYING:
+            self.update(controls)
+
+        elif self.state == GAME_OVER:
+            if controls.restart:
+                self.reset_level()
+                self.state = PLAYING
+
+    def update(self, controls):
+        player = self.player
+        collision = self.world.collision
+        camera = self.camera
+        profiler = self.profiler
+
+        camera.begin_tick()
+        # Enemies get theirs from the scheduler, only the ones that move this tick need it
+        player.prev_pos = player.rect.topleft
+
+        if self.world.streaming:
+            with profiler.stage("world.stream"):
+                self.stream_world()
+
+        # Update sprites
+        with profiler.stage("player.move"):
+            if controls.shoot and player.alive:
+                player.shoot(self.bullets)
+                self.events.append("shot")
+
+            if player.move(collision, camera, controls):
+                self.events.append("jump")
+
+            self.player_group.update()
+
+        if self.waves:
+            with profiler.stage("waves"):
+                for x, y in self.waves.update(camera, self.world.enemy_spawns, self.enemy_pool):
+                    self.spawn_enemy(x, y)
+
+        with profiler.stage("enemies.update"):
+            self.sight.begin_tick(collision, player)
+            self.enemy_ai.update(camera, self.world, self.sight, self.enemy_bullets)
+
+        with profiler.stage("bullets.update"):
+            self.bullets.update(camera)
+            self.enemy_bullets.update(camera)
+
+        with profiler.stage("collisions"):
+            self.check_collisions()
+
+    def stream_world(self):
+        spawns, evicted = self.world.update_streaming(self.camera)
+        for x, y in spawns:
+            self.spawn_enemy(x, y).spawn = (x, y)
+
+        # Enemies standing on chunks that were dropped go with them. Ones still alive give
+        # their spawn point back, to come back when its chunk loads again
+        if evicted:
+            chunk_width = CHUNK_TILES * TILE_SIZE
+            for enemy in self.enemy_group:
+                if enemy.rect.centerx // chunk_width not in self.world.chunks:
+                    if enemy.alive and enemy.spawn:
+                        self.world.release_spawn(enemy.spawn)
+                    enemy.despawn()
+            self.enemy_ai.invalidate()
+
+    def spawn_enemy(self, x, y):
+        enemy = self.enemy_pool.acquire(x, y)
+        self.enemy_group.add(enemy)
+        self.enemy_ai.invalidate()
+        return enemy
+
+    def check_collisions(self):
+        player = self.player
+        collision = self.world.collision
+
+        # Check for collisions between bullets and enemies
+        enemies = self.enemy_group.sprites() if len(self.bullets) else []
+        _, enemy_hits = self.bullets.collide_rects([enemy.rect for enemy in enemies])
+        for i in sorted(set(enemy_hits)):
+            enemy = enemies[i]
+            if enemy.alive:
+                enemy.alive = False
+                enemy.update_action("Death")
+                self.kills += 1
+
+        # Check for collisions between enemy bullets and player
+        _, player_hits = self.enemy_bullets.collide_rects([player.rect])
+        if player_hits:
+            if player.alive:
+                player.health -= 1
+                player.check_alive()
+                if not player.alive:
+                    self.state = GAME_OVER
+
+        # Check for collisions between bullets and obstacles
+        self.bullets.collide_tiles(collision)
+        self.enemy_bullets.collide_tiles(collision)
+
+    def counts(self):
+        counts = {"enemies": len(self.enemy_group), "bullets": len(self.bullets) + len(self.enemy_bullets)}
+        counts.update(self.enemy_ai.counts())
+        if self.waves:
+            counts["wave"] = self.waves.wave
+        return counts
+
+    def draw(self, screen, alpha=1.0):
+        self.draw_world(screen, alpha)
+        return self.draw_sprites(screen, alpha)
+
+    def draw_world(self, screen, alpha=1.0):
+        # Draw world tiles
+        with self.profiler.stage("world.draw"):
+            self.world.draw(screen, self.camera, alpha)
+
+    def draw_sprites(self, screen, alpha=1.0):
+        # Draw sprites, returns the rects they cover
+        with self.profiler.stage("sprites.draw"):
+            queue = self.render_queue
+            self.camera.draw(queue, self.player_group, alpha=alpha)
+            self.camera.draw(queue, self.enemy_group, alpha=alpha)
+            self.bullets.draw(queue, self.camera, alpha=alpha)
+            self.enemy_bullets.draw(queue, self.camera, alpha=alpha)
+            return queue.flush(screen)
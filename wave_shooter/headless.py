@@ -0,0 +1,66 @@
+import pygame
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from settings import *
+from controls import Controls
+from game import GameSession, PLAYING
+
+def init_headless():
+    # No window or audio, but a display mode is still needed for convert_alpha
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+def scripted_input(tick, session):
+    # Default playthrough: run right, hop over walls and keep shooting
+    return Controls(right=True, jump=tick % 45 < 10, shoot=tick % 20 == 0)
+
+def idle_input(tick, session):
+    return Controls()
+
+def run_session(level_path="Assets/level1_data.csv", ticks=FPS * 60, seed=0, script=scripted_input):
+    init_headless()
+    session = GameSession(level_path, state=PLAYING, seed=seed)
+    while session.tick < ticks and session.state == PLAYING:
+        session.step(script(session.tick, session))
+
+    return {
+        "level": level_path,
+        "seed": seed,
+        "ticks": session.tick,
+        "kills": session.kills,
+        "health": session.player.health,
+        "alive": session.player.alive,
+        "x": session.player.rect.x,
+    }
+
+def _run_job(job):
+    return run_session(**job)
+
+def run_batch(jobs, workers=None):
+    # Every worker process sets up its own dummy display once and reuses it
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_headless) as pool:
+        return list(pool.map(_run_job, jobs, chunksize=max(len(jobs) // (4 * (workers or os.cpu_count())), 1)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run headless Wave Shooter sessions")
+    parser.add_argument("--level", default="Assets/level1_data.csv")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=FPS * 60)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    jobs = [{"level_path": args.level, "ticks": args.ticks, "seed": seed} for seed in range(args.runs)]
+    start = time.perf_counter()
+    results = run_batch(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+
+    total_ticks = sum(result["ticks"] for result in results)
+    deaths = sum(1 for result in results if not result["alive"])
+    print(f"{len(results)} sessions, {total_ticks} ticks in {elapsed:.2f}s "
+          f"({total_ticks / elapsed:.0f} ticks/s, {total_ticks / FPS / elapsed:.1f}x real time)")
+    print(f"Average kills: {sum(result['kills'] for result in results) / len(results):.2f}, deaths: {deaths}")
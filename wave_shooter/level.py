@@ -1,7 +1,21 @@
 import pygame
-import csv
+import numpy as np
 import os
+from collections import OrderedDict
 from settings import *
+from collision import TileGrid
+from navigation import NavMap
+from render_queue import Atlas, RenderQueue
+from assets import load_image
+from level_file import load_level, tile_table
+
+def tile_paths():
+    paths = {}
+    for i in range(21): # Tiles 0 to 20
+        img_path = f"Assets/img/tile/{i}.png"
+        if os.path.exists(img_path):
+            paths[i] = img_path
+    return paths
 
 class Level:
     def __init__(self):
@@ -10,28 +24,19 @@ class Level:
 
     def load_images(self):
         self.tiles = {}
-        path = "Assets/img/tile"
-        for i in range(21): # Tiles 0 to 20
-            img_path = f"{path}/{i}.png"
-            if os.path.exists(img_path):
-                img = pygame.image.load(img_path).convert_alpha()
-                img = pygame.transform.scale(img, (TILE_SIZE, TILE_SIZE))
-                self.tiles[i] = img
+        for i, img_path in tile_paths().items():
+            self.tiles[i] = load_image(img_path, (TILE_SIZE, TILE_SIZE))
 
     def load_data(self, data_path):
         self.tile_list = []
-        with open(data_path, newline='') as csvfile:
-            reader = csv.reader(csvfile, delimiter=',')
-            for x, row in enumerate(reader):
-                for y, tile in enumerate(row):
-                    tile_id = int(tile)
-                    if tile_id >= 0:
-                        img = self.tiles.get(tile_id)
-                        if img:
-                            rect = img.get_rect()
-                            rect.x = y * TILE_SIZE
-                            rect.y = x * TILE_SIZE
-                            self.tile_list.append((img, rect))
+        level = load_level(data_path)
+        for y, x in zip(*np.nonzero(level.grid >= 0)):
+            img = self.tiles.get(int(level.grid[y, x]))
+            if img:
+                rect = img.get_rect()
+                rect.x = x * TILE_SIZE
+                rect.y = y * TILE_SIZE
+                self.tile_list.append((img, rect))
 
     def draw(self, screen):
         for tile in self.tile_list:
@@ -39,44 +44,165 @@ class Level:
 
 class World:
     def __init__(self):
-        self.obstacle_list = []
-        self.decoration_list = []
-
-    def process_data(self, data, tiles):
-        self.level_length = len(data[0])
-        # iterate through each value in level data file
-        for y, row in enumerate(data):
-            for x, tile in enumerate(row):
-                if tile >= 0:
-                    img = tiles.get(tile)
-                    img_rect = img.get_rect()
-                    img_rect.x = x * TILE_SIZE
-                    img_rect.y = y * TILE_SIZE
-                    tile_data = (img, img_rect)
-                    
-                    # Store tiles in different lists based on their ID
-                    if tile >= 0 and tile <= 8:
-                        self.obstacle_list.append(tile_data)
-                    elif tile >= 9 and tile <= 10:
-                        pass # water or something
-                    elif tile >= 11 and tile <= 14:
-                        self.decoration_list.append(tile_data) # decorations or pillars
-                    elif tile == 15: # player
-                        self.player_spawn = (x * TILE_SIZE, y * TILE_SIZE)
-                    elif tile == 16: # enemy
-                        self.enemy_spawn = (x * TILE_SIZE, y * TILE_SIZE)
-                    elif tile >= 17 and tile <= 19:
-                        pass # items
-                    elif tile == 20: # exit
-                        pass
-        return self.obstacle_list
-
-    def draw(self, screen, screen_scroll):
-        # Draw decorations first (behind obstacles)
-        for tile in self.decoration_list:
-            tile[1].x += screen_scroll
-            screen.blit(tile[0], tile[1])
-        # Draw obstacles
-        for tile in self.obstacle_list:
-            tile[1].x += screen_scroll
-            screen.blit(tile[0], tile[1])
+        # Static tiles of the loaded chunks by chunk index, as (decorations, obstacles). They
+        # are only baked into surfaces once a chunk is on screen, and only the last few used
+        # are kept, so the cost does not grow with the length of the level
+        self.chunks = {}
+        self.surfaces = OrderedDict()
+        self.player_spawn = None
+        self.enemy_spawns = []
+        # Spawn points that already put out their enemy by chunk, so reloading a chunk does
+        # not bring back the ones the player killed
+        self.used_spawns = {}
+        self.streaming = False
+
+    def process_data(self, level, tiles):
+        # Build the whole level up front, sorting the precomputed tables into chunks
+        self.tiles = tiles
+        self.atlas = Atlas(tiles.values())
+        self.rows = level.rows
+        self.level_length = level.cols
+        self.collision = TileGrid(level.rows, self.level_length)
+        self.nav = NavMap(self.collision)
+
+        chunk_count = (self.level_length + CHUNK_TILES - 1) // CHUNK_TILES
+        obstacles = [[] for _ in range(chunk_count)]
+        decorations = [[] for _ in range(chunk_count)]
+        for tile in level.obstacles.tolist():
+            obstacles[tile[1] // CHUNK_TILES].append(tile)
+        for tile in level.decorations.tolist():
+            decorations[tile[1] // CHUNK_TILES].append(tile) # decorations or pillars
+        for i in range(chunk_count):
+            self.load_chunk(i, obstacles[i], decorations[i])
+
+        if level.player_spawn:
+            self.player_spawn = (level.player_spawn[0] * TILE_SIZE, level.player_spawn[1] * TILE_SIZE)
+        self.enemy_spawns = [(x * TILE_SIZE, y * TILE_SIZE) for x, y in level.enemy_spawns.tolist()]
+
+    def stream(self, source, tiles):
+        # Chunks are built from the source as the camera gets close, see update_streaming
+        self.streaming = True
+        self.source = source
+        self.tiles = tiles
+        self.atlas = Atlas(tiles.values())
+        self.rows = source.rows
+        self.level_length = source.cols
+        self.collision = TileGrid(source.rows, self.level_length)
+        self.nav = NavMap(self.collision)
+        if source.player_spawn:
+            self.player_spawn = (source.player_spawn[0] * TILE_SIZE, source.player_spawn[1] * TILE_SIZE)
+
+    def update_streaming(self, camera):
+        # Load chunks around the viewport and drop the ones that fell out of range.
+        # Returns the enemy spawns of newly loaded chunks that have not been used yet and
+        # whether anything was evicted
+        chunk_width = CHUNK_TILES * TILE_SIZE
+        first = max(camera.scroll // chunk_width - STREAM_BEHIND, 0)
+        last = (camera.scroll + camera.width) // chunk_width + STREAM_AHEAD
+        if self.level_length is not None:
+            last = min(last, (self.level_length - 1) // CHUNK_TILES)
+
+        evicted = False
+        for i in list(self.chunks):
+            if i < first or i > last:
+                self.unload_chunk(i)
+                evicted = True
+
+        spawns = []
+        for i in range(first, last + 1):
+            if i in self.chunks:
+                continue
+            start = i * CHUNK_TILES
+            grid = self.source.columns(start, start + CHUNK_TILES)
+            obstacles = tile_table(grid, (grid >= 0) & (grid <= 8), start).tolist()
+            decorations = tile_table(grid, (grid >= 11) & (grid <= 14), start).tolist()
+            self.load_chunk(i, obstacles, decorations)
+            points = [((start + x) * TILE_SIZE, y * TILE_SIZE) for y, x in np.argwhere(grid == 16).tolist()]
+            # While streaming, enemy_spawns only holds the spawn points of loaded chunks
+            self.enemy_spawns += points
+            used = self.used_spawns.setdefault(i, set())
+            fresh = [point for point in points if point not in used]
+            used.update(fresh)
+            spawns += fresh
+
+        if self.level_length is None:
+            # The endless level only remembers a stretch either side of the view, so this
+            # does not grow for as long as the player keeps going
+            for i in list(self.used_spawns):
+                if i < first - SPAWN_MEMORY or i > last + SPAWN_MEMORY:
+                    del self.used_spawns[i]
+        return spawns, evicted
+
+    def release_spawn(self, point):
+        # The enemy from point left without being killed, it can spawn again
+        chunk_width = CHUNK_TILES * TILE_SIZE
+        self.used_spawns.get(point[0] // chunk_width, set()).discard(point)
+
+    def clear_chunks(self):
+        for i in list(self.chunks):
+            self.unload_chunk(i)
+        self.used_spawns.clear()
+
+    def make_tile(self, tile, x, y):
+        img = self.tiles.get(tile)
+        img_rect = img.get_rect()
+        img_rect.x = x * TILE_SIZE
+        img_rect.y = y * TILE_SIZE
+        return (img, img_rect)
+
+    def load_chunk(self, i, obstacles, decorations):
+        # Register the collision of one chunk, its tiles are baked once it is on screen
+        self.collision.add_chunk(i)
+        for y, x, tile in obstacles:
+            self.collision.add(y, x, self.make_tile(tile, x, y))
+        self.chunks[i] = (decorations, obstacles)
+        self.nav.invalidate(i)
+
+    def bake_chunk(self, i):
+        # The static tile layers of one chunk in a surface cropped to the rows with tiles,
+        # returns (surface, top) or None for a chunk with no tiles
+        decorations, obstacles = self.chunks[i]
+        rows = [y for y, x, tile in decorations] + [y for y, x, tile in obstacles]
+        if not rows:
+            return None
+        top = min(rows) * TILE_SIZE
+        chunk_width = CHUNK_TILES * TILE_SIZE
+        surface = pygame.Surface((chunk_width, (max(rows) + 1) * TILE_SIZE - top), pygame.SRCALPHA)
+
+        # Decorations first (behind obstacles)
+        queue = RenderQueue(self.atlas)
+        for layer, tiles in (("decorations", decorations), ("obstacles", obstacles)):
+            for y, x, tile in tiles:
+                queue.add(layer, self.tiles[tile], (x * TILE_SIZE - i * chunk_width, y * TILE_SIZE - top))
+        queue.flush(surface)
+        return surface.convert_alpha(), top
+
+    def chunk_surface(self, i):
+        if i in self.surfaces:
+            self.surfaces.move_to_end(i)
+            return self.surfaces[i]
+        baked = self.surfaces[i] = self.bake_chunk(i)
+        if len(self.surfaces) > CHUNK_CACHE:
+            self.surfaces.popitem(last=False)
+        return baked
+
+    def unload_chunk(self, i):
+        del self.chunks[i]
+        self.surfaces.pop(i, None)
+        if self.streaming:
+            chunk_width = CHUNK_TILES * TILE_SIZE
+            self.enemy_spawns = [spawn for spawn in self.enemy_spawns if spawn[0] // chunk_width != i]
+        self.collision.remove_chunk(i)
+        self.nav.invalidate(i)
+
+    def draw(self, screen, camera, alpha=1.0):
+        # Only the one or two chunks under the viewport get blitted
+        chunk_width = CHUNK_TILES * TILE_SIZE
+        scroll = camera.offset(alpha)
+        visible = []
+        for i in range(scroll // chunk_width, (scroll + camera.width) // chunk_width + 1):
+            baked = self.chunk_surface(i) if i in self.chunks else None
+            if baked is not None:
+                surface, top = baked
+                visible.append((surface, (i * chunk_width - scroll, top)))
+        screen.blits(visible, doreturn=False)
@@ -0,0 +1,113 @@
+import os
+import sys
+import mmap
+import struct
+import tempfile
+import numpy as np
+
+# Compiled level layout:
+#   header: magic, version, rows, cols, player spawn col/row (-1 if none),
+#           enemy spawn count, obstacle count, decoration count
+#   rows * cols int8 tile grid, padded to a multiple of 4 bytes
+#   enemy spawns (col, row) int32 pairs
+#   obstacles then decorations as (row, col, tile) int32 triples, row major
+# Columns are int32 throughout so levels, and the endless one, can go past column 32767
+MAGIC = b"WSLV"
+VERSION = 2
+HEADER = struct.Struct("<4sHHIiiIII")
+
+class LevelData:
+    def __init__(self, grid, player_spawn, enemy_spawns, obstacles, decorations):
+        self.grid = grid
+        self.rows, self.cols = grid.shape
+        self.player_spawn = player_spawn
+        self.enemy_spawns = enemy_spawns
+        self.obstacles = obstacles
+        self.decorations = decorations
+
+    def columns(self, start, stop):
+        return self.grid[:, start:stop]
+
+def tile_table(grid, mask, col_offset=0):
+    rows, cols = np.nonzero(mask)
+    return np.stack([rows, cols + col_offset, grid[rows, cols]], axis=1).astype(np.int32)
+
+def compile_level(data):
+    grid = np.asarray(data, dtype=np.int8)
+    players = np.argwhere(grid == 15)
+    # The last player tile wins, same as spawning them in order
+    player_spawn = (int(players[-1][1]), int(players[-1][0])) if len(players) else None
+    enemies = np.argwhere(grid == 16)[:, ::-1].astype(np.int32)
+    obstacles = tile_table(grid, (grid >= 0) & (grid <= 8))
+    decorations = tile_table(grid, (grid >= 11) & (grid <= 14))
+    return LevelData(grid, player_spawn, enemies, obstacles, decorations)
+
+def read_csv(path):
+    # A single parse straight into the tile grid, any number of columns
+    return np.loadtxt(path, delimiter=",", dtype=np.int8, ndmin=2)
+
+def save_level(level, path):
+    spawn = level.player_spawn or (-1, -1)
+    # Written next to the target and renamed over it, so other processes loading the same
+    # level never map a half written file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as levelfile:
+            levelfile.write(HEADER.pack(MAGIC, VERSION, level.rows, level.cols, spawn[0], spawn[1],
+                                        len(level.enemy_spawns), len(level.obstacles), len(level.decorations)))
+            levelfile.write(np.ascontiguousarray(level.grid).tobytes())
+            # Keep the int32 tables aligned
+            levelfile.write(b"\0" * (-level.grid.size % 4))
+            for array in (level.enemy_spawns, level.obstacles, level.decorations):
+                levelfile.write(np.ascontiguousarray(array, dtype=np.int32).tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def read_level(path):
+    with open(path, "rb") as levelfile:
+        buffer = mmap.mmap(levelfile.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, rows, cols, spawn_col, spawn_row, enemies, obstacles, decorations = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} compiled level")
+
+    # Views straight into the mapped file, nothing is parsed
+    offset = HEADER.size
+    grid = np.frombuffer(buffer, dtype=np.int8, count=rows * cols, offset=offset).reshape(rows, cols)
+    offset += rows * cols + -(rows * cols) % 4
+    tables = []
+    for count, width in ((enemies, 2), (obstacles, 3), (decorations, 3)):
+        tables.append(np.frombuffer(buffer, dtype=np.int32, count=count * width, offset=offset).reshape(count, width))
+        offset += count * width * 4
+    player_spawn = (spawn_col, spawn_row) if spawn_col >= 0 else None
+    return LevelData(grid, player_spawn, *tables)
+
+def compiled_path(path):
+    return os.path.splitext(path)[0] + ".lvl"
+
+def load_level(path):
+    if path.endswith(".lvl"):
+        return read_level(path)
+
+    # CSV levels are compiled once and the binary is reused while it is up to date
+    lvl_path = compiled_path(path)
+    if os.path.exists(lvl_path) and os.path.getmtime(lvl_path) >= os.path.getmtime(path):
+        try:
+            return read_level(lvl_path)
+        except (ValueError, struct.error):
+            # Older version or damaged, compile it again
+            pass
+    level = compile_level(read_csv(path))
+    try:
+        save_level(level, lvl_path)
+    except OSError:
+        pass
+    return level
+
+if __name__ == "__main__":
+    # Convert the given CSV levels: python level_file.py Assets/level1_data.csv ...
+    for path in sys.argv[1:]:
+        level = compile_level(read_csv(path))
+        save_level(level, compiled_path(path))
+        print(f"{path} -> {compiled_path(path)} ({level.rows}x{level.cols}, {len(level.enemy_spawns)} enemies)")
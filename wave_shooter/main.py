@@ -1,11 +1,17 @@
 import pygame
 import sys
-import csv
+import os
 from settings import *
-from player import Player
-from enemy import Enemy
-from bullet import Bullet
-from level import Level, World
+from controls import Controls
+from game import GameSession, MENU, PLAYING, GAME_OVER
+from profiler import Profiler, NullProfiler
+from render import FullRenderer, DirtyRenderer
+from background import ParallaxBackground
+from assets import preload, preload_sounds, is_loaded, load_image, load_sound, animation_paths
+from level import tile_paths
+from text_cache import render_text
+from replay import InputRecorder
+from sim_worker import RemoteSession
 
 pygame.init()
 pygame.mixer.init()
@@ -14,12 +20,15 @@ pygame.mixer.init()
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Wave Shooter")
 clock = pygame.time.Clock()
+renderer = DirtyRenderer(screen) if DIRTY_RECTS else FullRenderer(screen)
 
-# Load background images
-sky_img = pygame.image.load("Assets/img/background/sky_cloud.png").convert_alpha()
-mountain_img = pygame.image.load("Assets/img/background/mountain.png").convert_alpha()
-pine1_img = pygame.image.load("Assets/img/background/pine1.png").convert_alpha()
-pine2_img = pygame.image.load("Assets/img/background/pine2.png").convert_alpha()
+# Decode images and sounds on a worker thread, in the order they are needed: the level
+# and sprites for the session, then the background, which the menu can do without
+BACKGROUND_PATHS = [f"Assets/img/background/{name}.png" for name in ("sky_cloud", "mountain", "pine1", "pine2")]
+SOUND_PATHS = {"shot": "Assets/audio/shot.wav", "jump": "Assets/audio/jump.wav"}
+preload(list(tile_paths().values()) + animation_paths("player") + animation_paths("enemy"))
+preload(BACKGROUND_PATHS)
+preload_sounds(SOUND_PATHS.values())
 
 # Load UI images
 heart_img = pygame.image.load("Assets/img/icons/heart.png").convert_alpha() if os.path.exists("Assets/img/icons/heart.png") else pygame.Surface((30, 30))
@@ -28,194 +37,143 @@ if not os.path.exists("Assets/img/icons/heart.png"):
 
 # Game variables
 bg_color = (144, 201, 120)
-TILE_SIZE = 40
-screen_scroll = 0
-scroll = 0
-
-def draw_bg():
-    screen.fill(bg_color)
-    width = sky_img.get_width()
-    for x in range(5):
-        screen.blit(sky_img, ((x * width) - scroll * 0.5, 0))
-        screen.blit(mountain_img, ((x * width) - scroll * 0.6, HEIGHT - mountain_img.get_height() - 300))
-        screen.blit(pine1_img, ((x * width) - scroll * 0.7, HEIGHT - pine1_img.get_height() - 150))
-        screen.blit(pine2_img, ((x * width) - scroll * 0.8, HEIGHT - pine2_img.get_height()))
-
-# Load music and sounds
+# Run with --profile to record stage timings, F3 shows them and F4 saves a trace
+profiler = Profiler() if "--profile" in sys.argv else NullProfiler()
+# --endless streams a generated level instead of level 1
+level_path = None if "--endless" in sys.argv else "Assets/level1_data.csv"
+# --worker runs the simulation in a second process, main only draws
+if "--worker" in sys.argv:
+    session = RemoteSession(level_path, profiler=profiler, waves=WAVES)
+else:
+    session = GameSession(level_path, profiler=profiler, waves=WAVES)
+
+# --record FILE saves the seed and every tick's input on exit, play it back with replay.py
+record_path = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+if record_path and "--worker" in sys.argv:
+    sys.exit("--record can not be used with --worker")
+recorder = InputRecorder(session) if record_path else None
+
+# Built once the menu is up and the images are decoded, plain colour until then
+background = None
+
+def make_background():
+    sky_img, mountain_img, pine1_img, pine2_img = [load_image(path) for path in BACKGROUND_PATHS]
+    return ParallaxBackground(bg_color, [
+        (sky_img, 0, 0.5),
+        (mountain_img, HEIGHT - mountain_img.get_height() - 300, 0.6),
+        (pine1_img, HEIGHT - pine1_img.get_height() - 150, 0.7),
+        (pine2_img, HEIGHT - pine2_img.get_height(), 0.8),
+    ])
+
+def draw_bg(surface, alpha=1.0):
+    if background is None:
+        surface.fill(bg_color)
+    else:
+        background.draw(surface, session.camera.offset(alpha))
+
+# Load music, it streams from disk so this is quick
 try:
     pygame.mixer.music.load("Assets/audio/music2.mp3")
     pygame.mixer.music.set_volume(0.3)
     pygame.mixer.music.play(-1, 0.0, 5000)
-    shot_sound = pygame.mixer.Sound("Assets/audio/shot.wav")
-    jump_sound = pygame.mixer.Sound("Assets/audio/jump.wav")
 except Exception as e:
     print(f"Error loading audio: {e}")
-    shot_sound = jump_sound = None
-
-# Sprite groups
-player_group = pygame.sprite.Group()
-enemy_group = pygame.sprite.Group()
-bullet_group = pygame.sprite.Group()
-enemy_bullet_group = pygame.sprite.Group()
-explosion_group = pygame.sprite.Group()
-
-kills = 0
-
-# Load level
-world_data = []
-for row in range(16):
-    r = [-1] * 150
-    world_data.append(r)
-
-with open("Assets/level1_data.csv", newline='') as csvfile:
-    reader = csv.reader(csvfile, delimiter=',')
-    for x, row in enumerate(reader):
-        for y, tile in enumerate(row):
-            world_data[x][y] = int(tile)
-
-level = Level()
-world = World()
-obstacle_list = world.process_data(world_data, level.tiles)
-
-# Spawn objects based on world_data
-for y, row in enumerate(world_data):
-    for x, tile in enumerate(row):
-        if tile == 15: # Player
-            player = Player(x * TILE_SIZE, y * TILE_SIZE)
-            player_group.add(player)
-        elif tile == 16: # Enemy
-            enemy = Enemy(x * TILE_SIZE, y * TILE_SIZE)
-            enemy_group.add(enemy)
-
-# Fallback if no player spawned
-if 'player' not in locals():
-    player = Player(200, HEIGHT - 100)
-    player_group.add(player)
 
 font = pygame.font.SysFont("Futura", 30)
+profiler_font = pygame.font.SysFont("Futura", 18)
 
-def draw_text(text, x, y):
-    img = font.render(text, True, WHITE)
-    screen.blit(img, (x, y))
-
-# Game states
-MENU = 0
-PLAYING = 1
-GAME_OVER = 2
-game_state = MENU
-
-def reset_level():
-    global scroll, screen_scroll, kills, player
-    scroll = 0
-    screen_scroll = 0
-    kills = 0
-    player_group.empty()
-    enemy_group.empty()
-    bullet_group.empty()
-    enemy_bullet_group.empty()
-    
-    # Respawn based on world_data
-    for y, row in enumerate(world_data):
-        for x, tile in enumerate(row):
-            if tile == 15: # Player
-                player = Player(x * TILE_SIZE, y * TILE_SIZE)
-                player_group.add(player)
-            elif tile == 16: # Enemy
-                enemy = Enemy(x * TILE_SIZE, y * TILE_SIZE)
-                enemy_group.add(enemy)
-                
-    if 'player' not in globals() or len(player_group) == 0:
-        player = Player(200, HEIGHT - 100)
-        player_group.add(player)
+def draw_text(text, x, y, surface=screen):
+    img = render_text(font, text, WHITE)
+    return surface.blit(img, (x, y))
 
-running = True
-while running:
-    clock.tick(FPS)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_SPACE and game_state == PLAYING and player.alive:
-                player.shoot(bullet_group, Bullet)
-                if shot_sound: shot_sound.play()
-
-    if game_state == MENU:
-        draw_bg()
-        draw_text("Wave Shooter", WIDTH // 2 - 100, HEIGHT // 2 - 50)
-        draw_text("Press SPACE to Start", WIDTH // 2 - 140, HEIGHT // 2)
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_SPACE]:
-            game_state = PLAYING
-
-    elif game_state == PLAYING:
-        draw_bg()
-        
-        # Draw world tiles
-        world.draw(screen, screen_scroll)
-
-        # Update sprites
-        screen_scroll, jumped = player.move(obstacle_list)
-        scroll -= screen_scroll # Total world scroll
-        
-        if jumped and jump_sound: 
-            jump_sound.play()
-            
-        player_group.update()
-        enemy_group.update(screen_scroll, obstacle_list, player, enemy_bullet_group, Bullet)
-        bullet_group.update(screen_scroll)
-        enemy_bullet_group.update(screen_scroll)
-        
-        # Check for collisions between bullets and enemies
-        for enemy in enemy_group:
-            if pygame.sprite.spritecollide(enemy, bullet_group, True):
-                if enemy.alive:
-                    enemy.alive = False
-                    enemy.update_action("Death")
-                    kills += 1
-
-        # Check for collisions between enemy bullets and player
-        if pygame.sprite.spritecollide(player, enemy_bullet_group, True):
-            if player.alive:
-                player.health -= 1
-                player.check_alive()
-                if not player.alive:
-                    game_state = GAME_OVER
-
-        # Check for collisions between bullets and obstacles
-        for bullet in bullet_group:
-            for tile in obstacle_list:
-                if tile[1].colliderect(bullet.rect):
-                    bullet.kill()
-                    break
-        for bullet in enemy_bullet_group:
-            for tile in obstacle_list:
-                if tile[1].colliderect(bullet.rect):
-                    bullet.kill()
-                    break
-
-        # Draw sprites
-        player_group.draw(screen)
-        enemy_group.draw(screen)
-        bullet_group.draw(screen)
-        enemy_bullet_group.draw(screen)
+shoot_pressed = False
+
+def draw(alpha):
+    # Render the state between the last two ticks, returns the rects drawn over the background
+    if session.state == PLAYING:
+        key = (PLAYING, session.camera.offset(alpha), background is not None)
+    else:
+        key = (session.state, session.kills, background is not None)
+
+    # Static parts of the frame, skipped entirely while the renderer's copy is still valid
+    surface = renderer.begin(key)
+    if surface is not None:
+        with profiler.stage("draw_bg"):
+            draw_bg(surface, alpha if session.state == PLAYING else 1.0)
+
+        if session.state == MENU:
+            draw_text("Wave Shooter", WIDTH // 2 - 100, HEIGHT // 2 - 50, surface)
+            draw_text("Press SPACE to Start", WIDTH // 2 - 140, HEIGHT // 2, surface)
+
+        elif session.state == PLAYING:
+            session.draw_world(surface, alpha)
+
+        elif session.state == GAME_OVER:
+            draw_text("GAME OVER", WIDTH // 2 - 100, HEIGHT // 2 - 50, surface)
+            draw_text(f"Final Kills: {session.kills}", WIDTH // 2 - 100, HEIGHT // 2, surface)
+            draw_text("Press R to Respawn", WIDTH // 2 - 140, HEIGHT // 2 + 50, surface)
+        renderer.end_background(surface)
+
+    rects = []
+    if session.state == PLAYING:
+        rects += session.draw_sprites(screen, alpha)
 
         # Draw UI
-        draw_text(f"Kills: {kills}", 10, 10)
-        for i in range(player.health):
-            screen.blit(heart_img, (10 + (i * 35), 45))
-
-    elif game_state == GAME_OVER:
-        draw_bg()
-        draw_text("GAME OVER", WIDTH // 2 - 100, HEIGHT // 2 - 50)
-        draw_text(f"Final Kills: {kills}", WIDTH // 2 - 100, HEIGHT // 2)
-        draw_text("Press R to Respawn", WIDTH // 2 - 140, HEIGHT // 2 + 50)
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_r]:
-            reset_level()
-            game_state = PLAYING
-
-    pygame.display.update()
+        with profiler.stage("hud"):
+            rects.append(draw_text(f"Kills: {session.kills}", 10, 10))
+            if session.waves and session.waves.wave:
+                rects.append(draw_text(f"Wave: {session.waves.wave}", WIDTH // 2 - 40, 10))
+            for i in range(session.player.health):
+                rects.append(screen.blit(heart_img, (10 + (i * 35), 45)))
+    return rects
+
+tick_time = 1 / FPS
+accumulator = 0.0
+running = True
+while running:
+    accumulator += min(clock.tick(MAX_FPS) / 1000, MAX_FRAME_TIME)
+    profiler.begin_frame()
+
+    with profiler.stage("events"):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    shoot_pressed = True
+                if event.key == pygame.K_F3:
+                    profiler.toggle()
+                if event.key == pygame.K_F4:
+                    profiler.dump("profile_trace.json")
+                    profiler.dump("profile_trace.csv")
+
+    # Run the simulation at a fixed rate however fast we are rendering
+    while accumulator >= tick_time:
+        controls = Controls.from_keyboard(shoot_pressed)
+        if recorder:
+            recorder.record(controls)
+        session.step(controls)
+        shoot_pressed = False
+        accumulator -= tick_time
+
+        for event in session.events:
+            sound = load_sound(SOUND_PATHS[event]) if event in SOUND_PATHS else None
+            if sound:
+                sound.play()
+
+    rects = draw(accumulator / tick_time)
+    rects.append(profiler.draw(screen, profiler_font))
+
+    with profiler.stage("display.update"):
+        renderer.present(rects)
+    profiler.end_frame(**session.counts())
+
+    # The first frame is out, build the background as soon as its images are ready
+    if background is None and is_loaded(BACKGROUND_PATHS):
+        background = make_background()
+
+if recorder:
+    recorder.save(record_path)
 
 pygame.quit()
 sys.exit()
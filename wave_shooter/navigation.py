@@ -0,0 +1,81 @@
+import numpy as np
+from settings import *
+
+class NavMap:
+    def __init__(self, collision, clearance=2):
+        # For every cell something clearance tiles tall can stand in (empty with solid ground
+        # below), the first and last column of the walkable span it is part of. Built per
+        # chunk from the collision bitmap the first time a chunk is asked about
+        self.collision = collision
+        self.clearance = clearance
+        self.chunks = {}
+
+    def invalidate(self, chunk):
+        # Spans can run over chunk edges, so the neighbours change too
+        for i in (chunk - 1, chunk, chunk + 1):
+            self.chunks.pop(i, None)
+
+    def build(self, chunk):
+        rows = self.collision.rows
+        empty = np.zeros((rows, CHUNK_TILES), dtype=bool)
+        # The chunk and its neighbours, so spans crossing an edge are not cut short. Longer
+        # spans are cut at the far side of a neighbour, but anything standing in this chunk
+        # looks its span up again from the next chunk's table well before getting there
+        solid = np.concatenate([self.collision.solid.get(i, empty) for i in (chunk - 1, chunk, chunk + 1)], axis=1)
+        width = solid.shape[1]
+
+        # Cells blocked somewhere in the body above them, rows above the level are open
+        blocked = solid.copy()
+        for i in range(1, self.clearance):
+            blocked[i:] |= solid[:-i]
+        ground = np.zeros_like(solid)
+        ground[:-1] = solid[1:]
+        standing = ground & ~blocked
+
+        # Start and end column of each run of standing cells
+        columns = np.arange(width)
+        before = np.zeros_like(standing)
+        before[:, 1:] = standing[:, :-1]
+        after = np.zeros_like(standing)
+        after[:, :-1] = standing[:, 1:]
+        left = np.maximum.accumulate(np.where(standing & ~before, columns, 0), axis=1)
+        right = np.minimum.accumulate(np.where(standing & ~after, columns, width)[:, ::-1], axis=1)[:, ::-1]
+
+        # Keep the middle chunk, in absolute columns, -1 where nothing can stand
+        middle = slice(CHUNK_TILES, 2 * CHUNK_TILES)
+        offset = (chunk - 1) * CHUNK_TILES
+        standing = standing[:, middle]
+        spans = np.full((rows, CHUNK_TILES, 2), -1, dtype=np.int32)
+        spans[..., 0] = np.where(standing, left[:, middle] + offset, -1)
+        spans[..., 1] = np.where(standing, right[:, middle] + offset, -1)
+        self.chunks[chunk] = spans
+        return spans
+
+    def span_at(self, row, col):
+        # (first column, last column) of the walkable span at a standing cell, or None
+        if not 0 <= row < self.collision.rows:
+            return None
+        chunk, x = divmod(col, CHUNK_TILES)
+        if chunk not in self.collision.solid:
+            return None
+        spans = self.chunks.get(chunk)
+        if spans is None:
+            spans = self.build(chunk)
+        left, right = spans[row, x]
+        if left < 0:
+            return None
+        return int(left), int(right)
+
+    def ground_span(self, rect):
+        # Pixel limits of the span rect is standing on, if it is standing with its whole
+        # body on one
+        if rect.bottom % TILE_SIZE:
+            return None
+        span = self.span_at(rect.bottom // TILE_SIZE - 1, rect.centerx // TILE_SIZE)
+        if span is None:
+            return None
+        left = span[0] * TILE_SIZE
+        right = (span[1] + 1) * TILE_SIZE
+        if rect.left < left or rect.right > right:
+            return None
+        return left, right
@@ -1,13 +1,17 @@
-import pygame
-import os
 from settings import *
+from assets import load_animations
+from entities import Entity
+
+class Player(Entity):
+    __slots__ = ("animations", "flipped_animations", "action", "frame_index", "image", "rect", "prev_pos", "flip",
+                 "vel_y", "jumped", "in_air", "speed", "direction", "shoot_cooldown", "health", "max_health",
+                 "alive", "animation_timer", "max_jumps", "double_shot")
 
-class Player(pygame.sprite.Sprite):
     def __init__(self, x, y):
         super().__init__()
 
-        self.animations = {}
-        self.load_animations()
+        self.animations = load_animations("player")
+        self.flipped_animations = load_animations("player", flipped=True)
 
         self.action = "Idle"
         self.frame_index = 0
@@ -27,23 +31,10 @@ class Player(pygame.sprite.Sprite):
         self.health = 5
         self.max_health = 5
         self.alive = True
-        self.update_time = pygame.time.get_ticks()
-
-    def load_animations(self):
-        animation_types = ["Idle", "Run", "Jump", "Death"]
-
-        for animation in animation_types:
-            temp_list = []
-            path = f"Assets/img/player/{animation}"
-            frames = len(os.listdir(path))
-
-            for i in range(frames):
-                img = pygame.image.load(f"{path}/{i}.png").convert_alpha()
-                img = pygame.transform.scale(img, (int(img.get_width() * 1.5),
-                                                   int(img.get_height() * 1.5)))
-                temp_list.append(img)
-
-            self.animations[animation] = temp_list
+        self.animation_timer = 0
+        # Set by the upgrade menu
+        self.max_jumps = 1
+        self.double_shot = False
 
     def update(self):
         self.update_animation()
@@ -52,27 +43,24 @@ class Player(pygame.sprite.Sprite):
         if self.shoot_cooldown > 0:
             self.shoot_cooldown -= 1
 
-    def move(self, obstacle_list):
-        screen_scroll = 0
+    def move(self, collision, camera, controls):
         dx = 0
         dy = 0
         jumped_this_frame = False
 
         if self.alive:
-            keys = pygame.key.get_pressed()
-
-            if keys[pygame.K_a]:
+            if controls.left:
                 dx = -self.speed
                 self.flip = True
                 self.direction = -1
-            if keys[pygame.K_d]:
+            if controls.right:
                 dx = self.speed
                 self.flip = False
                 self.direction = 1
-            if not keys[pygame.K_w]:
+            if not controls.jump:
                 self.jumped = False
             
-            if keys[pygame.K_w] and not self.jumped and not self.in_air:
+            if controls.jump and not self.jumped and not self.in_air:
                 self.vel_y = -15
                 self.jumped = True
                 jumped_this_frame = True
@@ -88,35 +76,33 @@ class Player(pygame.sprite.Sprite):
 
         # Check for collision in x direction
         self.rect.x += dx
-        for tile in obstacle_list:
-            if tile[1].colliderect(self.rect):
+        for tile in collision.collide(self.rect):
+            if tile.colliderect(self.rect):
                 if dx > 0:
-                    self.rect.right = tile[1].left
+                    self.rect.right = tile.left
                 if dx < 0:
-                    self.rect.left = tile[1].right
+                    self.rect.left = tile.right
                 dx = 0
 
         # Check for collision in y direction
         self.rect.y += dy
-        for tile in obstacle_list:
-            if tile[1].colliderect(self.rect):
+        for tile in collision.collide(self.rect):
+            if tile.colliderect(self.rect):
                 # Check if below the ground (jumping)
                 if self.vel_y < 0:
                     self.vel_y = 0
-                    self.rect.top = tile[1].bottom
+                    self.rect.top = tile.bottom
                     dy = 0
                 # Check if above the ground (falling)
                 elif self.vel_y >= 0:
                     self.vel_y = 0
                     self.in_air = False
-                    self.rect.bottom = tile[1].top
+                    self.rect.bottom = tile.top
                     dy = 0
 
         # Update scroll based on player position
         if self.alive:
-            if self.rect.right > WIDTH - SCROLL_THRESH or self.rect.left < SCROLL_THRESH:
-                self.rect.x -= dx
-                screen_scroll = -dx
+            camera.follow(self.rect, dx)
 
         # Animation switching
         if not self.alive:
@@ -128,27 +114,28 @@ class Player(pygame.sprite.Sprite):
         else:
             self.update_action("Idle")
 
-        return screen_scroll, jumped_this_frame
+        return jumped_this_frame
 
-    def shoot(self, bullet_group, bullet_class):
+    def shoot(self, bullets):
         if self.shoot_cooldown == 0:
             self.shoot_cooldown = 20
-            bullet = bullet_class(self.rect.centerx + (0.8 * self.rect.size[0] * self.direction),
-                                  self.rect.centery,
-                                  self.direction)
-            bullet_group.add(bullet)
+            bullets.spawn(self.rect.centerx + (0.8 * self.rect.size[0] * self.direction),
+                          self.rect.centery,
+                          self.direction)
 
     def update_animation(self):
         # Update animation
-        ANIMATION_COOLDOWN = 100
+        ANIMATION_COOLDOWN = 6 # ticks
         # Update image depending on current frame
-        self.image = self.animations[self.action][self.frame_index]
         if self.flip:
-            self.image = pygame.transform.flip(self.image, True, False)
+            self.image = self.flipped_animations[self.action][self.frame_index]
+        else:
+            self.image = self.animations[self.action][self.frame_index]
         
-        # Check if enough time has passed since the last update
-        if pygame.time.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
-            self.update_time = pygame.time.get_ticks()
+        # Check if enough ticks have passed since the last update
+        self.animation_timer += 1
+        if self.animation_timer > ANIMATION_COOLDOWN:
+            self.animation_timer = 0
             self.frame_index += 1
 
         # If the animation has run out then reset back to the start
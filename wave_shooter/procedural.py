@@ -0,0 +1,49 @@
+import random
+import numpy as np
+from settings import *
+
+class ProceduralLevel:
+    def __init__(self, seed=0, base=None, rows=16):
+        # Endless level, optionally continuing on from the end of a normal one
+        self.seed = seed
+        self.base = base
+        self.rows = base.rows if base else rows
+        self.cols = None
+        if base and base.player_spawn:
+            self.player_spawn = base.player_spawn
+        else:
+            self.player_spawn = (2, self.rows - 3)
+
+    def generate_chunk(self, chunk):
+        # Every chunk comes from its own seed so an evicted chunk streams back in unchanged
+        rng = random.Random(self.seed * 1000003 + chunk)
+        grid = np.full((self.rows, CHUNK_TILES), -1, dtype=np.int8)
+        ground = self.rows - 2
+        grid[ground, :] = 0
+        grid[ground + 1:, :] = 4
+
+        if chunk > 0:
+            # A gap to jump over and a couple of platforms
+            gap = rng.randint(4, CHUNK_TILES - 6)
+            grid[ground:, gap:gap + rng.randint(1, 2)] = -1
+            for i in range(rng.randint(1, 2)):
+                x = rng.randint(0, CHUNK_TILES - 6)
+                grid[rng.randint(ground - 6, ground - 3), x:x + rng.randint(3, 5)] = 0
+            for i in range(rng.randint(0, 3)):
+                x = rng.randint(0, CHUNK_TILES - 1)
+                if grid[ground, x] == 0 and grid[ground - 1, x] == -1:
+                    grid[ground - 1, x] = 16
+        return grid
+
+    def columns(self, start, stop):
+        base_cols = self.base.cols if self.base else 0
+        parts = []
+        if start < base_cols:
+            parts.append(self.base.columns(start, min(stop, base_cols)))
+        col = max(start, base_cols)
+        while col < stop:
+            chunk, x = divmod(col - base_cols, CHUNK_TILES)
+            end = min(stop - col + x, CHUNK_TILES)
+            parts.append(self.generate_chunk(chunk)[:, x:end])
+            col += end - x
+        return np.concatenate(parts, axis=1)
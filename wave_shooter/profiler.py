@@ -0,0 +1,130 @@
+import time
+import csv
+import json
+from collections import deque
+from contextlib import nullcontext
+from settings import *
+from text_cache import overlay
+
+class _Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        elapsed = (time.perf_counter() - self.start) * 1000
+        timings = self.profiler.current
+        timings[self.name] = timings.get(self.name, 0.0) + elapsed
+
+class Profiler:
+    def __init__(self, size=600):
+        # Ring buffer of per frame records: stage timings in ms plus counts
+        self.frames = deque(maxlen=size)
+        self.stages = []
+        self.contexts = {}
+        self.current = {}
+        self.counts = {}
+        self.visible = False
+        self.frame_start = None
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        self.current = {}
+        # Time between frames includes waiting on the clock, so it gives the real FPS
+        if self.frame_start is not None:
+            self.current["interval"] = (now - self.frame_start) * 1000
+        self.frame_start = now
+
+    def stage(self, name):
+        context = self.contexts.get(name)
+        if context is None:
+            context = self.contexts[name] = _Stage(self, name)
+            self.stages.append(name)
+        return context
+
+    def end_frame(self, **counts):
+        record = dict(self.current)
+        record["frame"] = (time.perf_counter() - self.frame_start) * 1000
+        record.update(counts)
+        self.counts = counts
+        self.frames.append(record)
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def percentile(self, key, p):
+        values = sorted(frame.get(key, 0.0) for frame in self.frames)
+        if not values:
+            return 0.0
+        return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+    def mean(self, key):
+        if not self.frames:
+            return 0.0
+        return sum(frame.get(key, 0.0) for frame in self.frames) / len(self.frames)
+
+    def summary(self):
+        summary = {
+            "frames": len(self.frames),
+            "fps": 1000 / self.mean("interval") if self.mean("interval") else 0.0,
+            "frame_p50": self.percentile("frame", 50),
+            "frame_p99": self.percentile("frame", 99),
+        }
+        for name in self.stages:
+            summary[name] = self.mean(name)
+        return summary
+
+    def draw(self, screen, font):
+        if not self.visible:
+            return None
+        summary = self.summary()
+        lines = [f"FPS {summary['fps']:.0f}  p50 {summary['frame_p50']:.2f}ms  p99 {summary['frame_p99']:.2f}ms"]
+        lines.append("  ".join(f"{name} {count}" for name, count in self.counts.items()))
+        for name in self.stages:
+            lines.append(f"{name}: {summary[name]:.3f}ms")
+
+        rect = screen.blit(overlay((360, 10 + len(lines) * 20), BLACK, 180), (WIDTH - 370, 10))
+        # The numbers change every frame, so these lines are not worth caching
+        for i, line in enumerate(lines):
+            screen.blit(font.render(line, True, WHITE), (WIDTH - 365, 15 + i * 20))
+        return rect
+
+    def dump(self, path):
+        # Trace of every buffered frame for offline analysis, CSV or JSON by extension
+        keys = ["frame", "interval"] + self.stages
+        for frame in self.frames:
+            keys += [key for key in frame if key not in keys]
+        if path.endswith(".csv"):
+            with open(path, "w", newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=keys, restval=0)
+                writer.writeheader()
+                writer.writerows(self.frames)
+        else:
+            with open(path, "w") as jsonfile:
+                json.dump({"summary": self.summary(), "frames": list(self.frames)}, jsonfile, indent=1)
+
+class NullProfiler:
+    # Stands in when profiling is off so the game loop can always call it
+    visible = False
+    _stage = nullcontext()
+
+    def begin_frame(self):
+        pass
+
+    def stage(self, name):
+        return self._stage
+
+    def end_frame(self, **counts):
+        pass
+
+    def toggle(self):
+        pass
+
+    def draw(self, screen, font):
+        pass
+
+    def dump(self, path):
+        pass
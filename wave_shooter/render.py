@@ -0,0 +1,59 @@
+import pygame
+
+class FullRenderer:
+    # Redraws and pushes the whole screen every frame
+    def __init__(self, screen):
+        self.screen = screen
+
+    def begin(self, key):
+        return self.screen
+
+    def end_background(self, surface):
+        pass
+
+    def present(self, rects):
+        pygame.display.update()
+
+class DirtyRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        # Copy of the static part of the frame (background, tiles, menu text)
+        self.background = screen.copy()
+        self.cached_key = None
+        self.last_key = None
+        self.previous = []
+        self.full = True
+
+    def begin(self, key):
+        # key identifies what the static background shows, e.g. the state and scroll offset.
+        # Returns the surface to draw the background onto, or None when the cached one still
+        # matches and only the rects drawn last frame need restoring
+        still = key == self.last_key
+        self.last_key = key
+        if still and key == self.cached_key:
+            self.full = False
+            for rect in self.previous:
+                self.screen.blit(self.background, rect, rect)
+            return None
+
+        self.full = True
+        if still:
+            # Things stopped moving, keep a copy of the background for the frames to come
+            self.cached_key = key
+            return self.background
+        # Scrolling, so the background changes every frame anyway and goes straight to the screen
+        self.cached_key = None
+        return self.screen
+
+    def end_background(self, surface):
+        if surface is self.background:
+            self.screen.blit(self.background, (0, 0))
+
+    def present(self, rects):
+        rects = [rect for rect in rects if rect]
+        if self.full:
+            pygame.display.update()
+        elif self.previous or rects:
+            # Where sprites were last frame and where they are now
+            pygame.display.update(self.previous + rects)
+        self.previous = rects
@@ -0,0 +1,59 @@
+import pygame
+
+class Atlas:
+    def __init__(self, images, width=1024):
+        # Packs images into rows of one surface, tallest first so the rows waste little space
+        self.images = list(images)
+        self.areas = {}
+        x = y = row_height = 0
+        placed = []
+        for image in sorted(self.images, key=lambda image: -image.get_height()):
+            if id(image) in self.areas:
+                continue
+            w, h = image.get_size()
+            if x + w > width:
+                x = 0
+                y += row_height
+                row_height = 0
+            area = pygame.Rect(x, y, w, h)
+            self.areas[id(image)] = area
+            placed.append((image, area))
+            x += w
+            row_height = max(row_height, h)
+
+        self.surface = pygame.Surface((width, max(y + row_height, 1)), pygame.SRCALPHA)
+        for image, area in placed:
+            # MAX onto the cleared atlas copies the pixels as they are, alpha included
+            self.surface.blit(image, area, special_flags=pygame.BLEND_RGBA_MAX)
+        self.surface = self.surface.convert_alpha()
+
+    def source(self, image):
+        # (surface, area) to blit image from, images not in the atlas are used directly
+        area = self.areas.get(id(image))
+        if area is None:
+            return image, None
+        return self.surface, area
+
+class RenderQueue:
+    def __init__(self, atlas=None):
+        # Draw commands by layer, each layer goes out in one Surface.blits call
+        self.atlas = atlas
+        self.layers = {}
+
+    def add(self, layer, image, dest):
+        image, area = self.atlas.source(image) if self.atlas else (image, None)
+        self.layers.setdefault(layer, []).append((image, dest, area))
+
+    def extend(self, layer, image, dests):
+        # Many copies of one image
+        image, area = self.atlas.source(image) if self.atlas else (image, None)
+        self.layers.setdefault(layer, []).extend((image, dest, area) for dest in dests)
+
+    def flush(self, surface):
+        # Layers in the order they were first added to, returns the rects drawn
+        rects = []
+        for commands in self.layers.values():
+            if commands:
+                rects += surface.blits(commands)
+        self.layers = {}
+        return rects
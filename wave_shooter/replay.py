@@ -0,0 +1,119 @@
+import sys
+import time
+import zlib
+import struct
+import argparse
+from settings import *
+from controls import Controls
+from game import GameSession
+
+# Replay layout:
+#   header: magic, version, seed, tick count, final state checksum, flags, initial state,
+#           level path length
+#   level path, utf-8 (empty for the endless level)
+#   zlib compressed input log, one packed Controls byte per tick
+MAGIC = b"WSRP"
+VERSION = 1
+HEADER = struct.Struct("<4sHIIIBBH")
+
+FLAG_ENDLESS = 1
+FLAG_STREAMING = 2
+FLAG_WAVES = 4
+
+def state_checksum(session):
+    # Enough of the end state to tell whether a replay went the same way as the recording
+    player = session.player
+    state = (session.tick, session.state, session.kills, player.health, player.rect.x, player.rect.y,
+             session.camera.scroll, len(session.enemy_group), len(session.bullets), len(session.enemy_bullets))
+    return zlib.crc32(repr(state).encode())
+
+class InputRecorder:
+    def __init__(self, session):
+        if session.world_data is not None:
+            raise ValueError("Only sessions loaded from a level file or the endless level can be recorded")
+        if session.tick != 0:
+            raise ValueError("Recording has to start from the first tick")
+        self.session = session
+        self.state = session.state
+        self.inputs = bytearray()
+
+    def record(self, controls):
+        # Call with the controls of every tick, right before session.step
+        self.inputs.append(controls.pack())
+
+    def save(self, path):
+        session = self.session
+        flags = 0
+        if session.level_path is None:
+            flags |= FLAG_ENDLESS
+        if session.streaming:
+            flags |= FLAG_STREAMING
+        if session.waves:
+            flags |= FLAG_WAVES
+        level_path = (session.level_path or "").encode()
+        with open(path, "wb") as replayfile:
+            replayfile.write(HEADER.pack(MAGIC, VERSION, session.seed, len(self.inputs), state_checksum(session),
+                                         flags, self.state, len(level_path)))
+            replayfile.write(level_path)
+            replayfile.write(zlib.compress(bytes(self.inputs)))
+
+class Replay:
+    def __init__(self, seed, level_path, flags, state, inputs, checksum):
+        self.seed = seed
+        self.level_path = level_path
+        self.flags = flags
+        self.state = state
+        self.inputs = inputs
+        self.checksum = checksum
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def session(self, profiler=None):
+        return GameSession(self.level_path, state=self.state, profiler=profiler,
+                           streaming=bool(self.flags & FLAG_STREAMING), seed=self.seed,
+                           waves=bool(self.flags & FLAG_WAVES))
+
+    def input(self, tick, session):
+        # Same signature as the headless input scripts
+        return Controls.unpack(self.inputs[tick])
+
+def load_replay(path):
+    with open(path, "rb") as replayfile:
+        data = replayfile.read()
+    magic, version, seed, ticks, checksum, flags, state, path_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} replay")
+    start = HEADER.size
+    level_path = None if flags & FLAG_ENDLESS else data[start:start + path_length].decode()
+    inputs = zlib.decompress(data[start + path_length:])
+    if len(inputs) != ticks:
+        raise ValueError(f"{path} is truncated")
+    return Replay(seed, level_path, flags, state, inputs, checksum)
+
+def run_replay(replay, profiler=None):
+    # As fast as the simulation will go, nothing is drawn
+    session = replay.session(profiler)
+    while session.tick < len(replay):
+        session.step(replay.input(session.tick, session))
+    return session
+
+if __name__ == "__main__":
+    from headless import init_headless
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Wave Shooter session headlessly")
+    parser.add_argument("replay")
+    args = parser.parse_args()
+
+    init_headless()
+    replay = load_replay(args.replay)
+    start = time.perf_counter()
+    session = run_replay(replay)
+    elapsed = time.perf_counter() - start
+
+    matches = state_checksum(session) == replay.checksum
+    print(f"{len(replay)} ticks in {elapsed:.2f}s ({len(replay) / FPS / elapsed:.1f}x real time)")
+    print(f"Kills: {session.kills}, health: {session.player.health}, x: {session.player.rect.x}")
+    print("End state matches the recording" if matches else "End state DIVERGED from the recording")
+    if not matches:
+        sys.exit(1)
@@ -1,8 +1,16 @@
 WIDTH = 800
 HEIGHT = 640
-FPS = 60
+FPS = 60 # Simulation ticks per second
+MAX_FPS = 240 # Render cap, 0 renders as fast as possible
+DIRTY_RECTS = True # Only push changed parts of the screen when the camera is still
+MAX_FRAME_TIME = 0.25 # Longest real frame the simulation will try to catch up on
 
 TILE_SIZE = 40
+CHUNK_TILES = 20
+STREAM_AHEAD = 2 # Chunks kept loaded past each edge of the screen when streaming
+STREAM_BEHIND = 2
+SPAWN_MEMORY = 64 # Chunks past the loaded ones where killed enemies stay dead on the endless level
+CHUNK_CACHE = 6 # Baked chunk surfaces kept around for drawing
 
 GRAVITY = 0.75
 PLAYER_SPEED = 5
@@ -10,4 +18,5 @@ BULLET_SPEED = 10
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
-SCROLL_THRESH = 200
\ No newline at end of file
+SCROLL_THRESH = 200
+WAVES = True # Send escalating waves of enemies on top of the ones placed in the level
\ No newline at end of file
@@ -0,0 +1,73 @@
+from settings import *
+
+VISION_RANGE = 150
+VISION_HEIGHT = 20
+
+class LineOfSight:
+    def __init__(self):
+        self.collision = None
+        self.target = None
+        self.cache = {}
+
+    def begin_tick(self, collision, target):
+        # The target only moves between ticks, so its cell and every ray cast towards it
+        # this tick can be shared by all the enemies looking
+        self.collision = collision
+        self.target = target if target.alive else None
+        self.cache = {}
+        if self.target:
+            self.target_cell = (target.rect.centerx // TILE_SIZE, target.rect.centery // TILE_SIZE)
+
+    def can_see(self, rect, direction):
+        # The target has to be inside the vision box in front of rect, with no solid tile
+        # between the two
+        target = self.target
+        if target is None:
+            return False
+        top = rect.centery - VISION_HEIGHT // 2
+        if direction == 1:
+            left = rect.right
+        else:
+            left = rect.left - VISION_RANGE
+        other = target.rect
+        if not (other.right > left and other.left < left + VISION_RANGE
+                and other.bottom > top and other.top < top + VISION_HEIGHT):
+            return False
+
+        cell = (rect.centerx // TILE_SIZE, rect.centery // TILE_SIZE)
+        clear = self.cache.get(cell)
+        if clear is None:
+            clear = self.cache[cell] = self.ray_clear(cell, self.target_cell)
+        return clear
+
+    def ray_clear(self, start, end):
+        # Walk the cells crossed by the line between the two cell centres (Amanatides & Woo)
+        col, row = start
+        end_col, end_row = end
+        d_col = end_col - col
+        d_row = end_row - row
+        step_col = 1 if d_col > 0 else -1
+        step_row = 1 if d_row > 0 else -1
+        # Distance along the line, from 0 to 1, to the next column and row boundary
+        t_col = 0.5 / abs(d_col) if d_col else 2.0
+        t_row = 0.5 / abs(d_row) if d_row else 2.0
+        delta_col = 1 / abs(d_col) if d_col else 2.0
+        delta_row = 1 / abs(d_row) if d_row else 2.0
+
+        tile_at = self.collision.tile_at
+        while (col, row) != (end_col, end_row):
+            if t_col < t_row:
+                col += step_col
+                t_col += delta_col
+            elif t_row < t_col:
+                row += step_row
+                t_row += delta_row
+            else:
+                # Straight through a corner
+                col += step_col
+                row += step_row
+                t_col += delta_col
+                t_row += delta_row
+            if (col, row) != (end_col, end_row) and tile_at(row, col) is not None:
+                return False
+        return True
@@ -0,0 +1,244 @@
+import os
+import sys
+import atexit
+import subprocess
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from assets import animation_frames, load_atlas
+from bullet import BulletPool
+from camera import Camera
+from controls import Controls
+from game import MENU
+from level import Level, World
+from level_file import load_level
+from procedural import ProceduralLevel
+from profiler import NullProfiler
+from render_queue import RenderQueue
+
+# The simulation runs in a worker process and publishes what is needed to draw each tick
+# into one of two snapshot buffers in shared memory, alternating by tick. While the main
+# process draws tick N from one buffer the worker computes N + 1 into the other.
+#
+# Snapshot layout, all int32:
+#   header: see HEADER_FIELDS
+#   sprites: (image, x, y, prev x, prev y) for the player and the enemies on screen
+#   bullets: (x, y, prev x) for player bullets, then enemy bullets
+#
+# The worker reads one packed Controls byte per tick on stdin and answers with one
+# byte of sound event flags once that tick's snapshot is written.
+HEADER_FIELDS = ("tick", "state", "kills", "health", "alive", "scroll", "prev_scroll", "wave",
+                 "enemies", "bullets", "sprites", "player_bullets", "enemy_bullets")
+MAX_SPRITES = 1024
+MAX_BULLETS = 1024
+EVENTS = ("shot", "jump")
+
+SPRITE_SETS = ("player", "enemy")
+
+class SnapshotBuffer:
+    SIZE = 4 * (len(HEADER_FIELDS) + MAX_SPRITES * 5 + MAX_BULLETS * 3)
+
+    def __init__(self, buffer, offset):
+        self.header = np.ndarray(len(HEADER_FIELDS), dtype=np.int32, buffer=buffer, offset=offset)
+        offset += self.header.nbytes
+        self.sprites = np.ndarray((MAX_SPRITES, 5), dtype=np.int32, buffer=buffer, offset=offset)
+        offset += self.sprites.nbytes
+        self.bullets = np.ndarray((MAX_BULLETS, 3), dtype=np.int32, buffer=buffer, offset=offset)
+
+    def get(self, field):
+        return int(self.header[HEADER_FIELDS.index(field)])
+
+    def write(self, session, image_index):
+        camera = session.camera
+        sprites = []
+        for group in (session.player_group, session.enemy_group):
+            for sprite in group:
+                if len(sprites) < MAX_SPRITES and camera.is_visible(sprite.rect):
+                    x, y = sprite.rect.topleft
+                    prev_x, prev_y = getattr(sprite, "prev_pos", (x, y))
+                    sprites.append((image_index[id(sprite.image)], x, y, prev_x, prev_y))
+        if sprites:
+            self.sprites[:len(sprites)] = sprites
+
+        counts = []
+        start = 0
+        for pool in (session.bullets, session.enemy_bullets):
+            alive = np.flatnonzero(pool.alive)[:MAX_BULLETS - start]
+            self.bullets[start:start + len(alive), 0] = pool.x[alive]
+            self.bullets[start:start + len(alive), 1] = pool.y[alive]
+            self.bullets[start:start + len(alive), 2] = pool.prev_x[alive]
+            counts.append(len(alive))
+            start += len(alive)
+
+        player = session.player
+        self.header[:] = (session.tick, session.state, session.kills, player.health, player.alive,
+                          camera.scroll, camera.prev_scroll, session.waves.wave if session.waves else 0,
+                          len(session.enemy_group), len(session.bullets) + len(session.enemy_bullets),
+                          len(sprites), counts[0], counts[1])
+
+class RemotePlayer:
+    def __init__(self):
+        self.health = 5
+        self.alive = True
+
+class RemoteWaves:
+    def __init__(self):
+        self.wave = 0
+
+class RemoteSession:
+    def __init__(self, level_path="Assets/level1_data.csv", state=MENU, profiler=None, streaming=False, seed=0,
+                 waves=False):
+        # Stands in for GameSession in main.py, drawing from the worker's snapshots
+        self.profiler = profiler or NullProfiler()
+        self.camera = Camera()
+        self.state = state
+        self.tick = 0
+        self.kills = 0
+        self.events = []
+        self.player = RemotePlayer()
+        self.waves = RemoteWaves() if waves else None
+        self.enemy_count = 0
+        self.bullet_count = 0
+        self.front = None
+        self.received = 0
+
+        # The level is built here as well, only for drawing
+        if level_path is not None:
+            level_data = load_level(level_path)
+        else:
+            level_data = ProceduralLevel(seed)
+            streaming = True
+        self.level = Level()
+        self.world = World()
+        if streaming:
+            self.world.stream(level_data, self.level.tiles)
+        else:
+            self.world.process_data(level_data, self.level.tiles)
+
+        self.images = animation_frames(SPRITE_SETS)
+        self.render_queue = RenderQueue(load_atlas(SPRITE_SETS))
+        self.bullets = BulletPool(MAX_BULLETS)
+        self.enemy_bullets = BulletPool(MAX_BULLETS)
+
+        self.memory = shared_memory.SharedMemory(create=True, size=SnapshotBuffer.SIZE * 2)
+        self.buffers = [SnapshotBuffer(self.memory.buf, i * SnapshotBuffer.SIZE) for i in range(2)]
+        args = [sys.executable, os.path.abspath(__file__), self.memory.name, level_path or "", str(state),
+                str(int(streaming)), str(seed), str(int(waves))]
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+        # The worker's first byte says it is ready and tick 0 is in buffer 0
+        self.pending = True
+        atexit.register(self.close)
+
+    def step(self, controls):
+        # The worker runs one tick ahead of what is drawn: collect the tick it was working on,
+        # then hand it the next one and return straight away
+        self.finish()
+        self.process.stdin.write(bytes([controls.pack()]))
+        self.process.stdin.flush()
+        self.pending = True
+
+    def finish(self):
+        if not self.pending:
+            return
+        with self.profiler.stage("worker.wait"):
+            reply = self.process.stdout.read(1)
+        if not reply:
+            raise RuntimeError("The simulation worker exited")
+        self.pending = False
+        self.events = [event for i, event in enumerate(EVENTS) if reply[0] >> i & 1]
+
+        front = self.front = self.buffers[self.received % 2]
+        self.received += 1
+        self.tick = front.get("tick")
+        self.state = front.get("state")
+        self.kills = front.get("kills")
+        self.player.health = front.get("health")
+        self.player.alive = bool(front.get("alive"))
+        if self.waves:
+            self.waves.wave = front.get("wave")
+        self.enemy_count = front.get("enemies")
+        self.bullet_count = front.get("bullets")
+        self.camera.scroll = front.get("scroll")
+        self.camera.prev_scroll = front.get("prev_scroll")
+        if self.world.streaming:
+            self.world.update_streaming(self.camera)
+
+        start = 0
+        for pool, field in ((self.bullets, "player_bullets"), (self.enemy_bullets, "enemy_bullets")):
+            count = front.get(field)
+            pool.x[:count] = front.bullets[start:start + count, 0]
+            pool.y[:count] = front.bullets[start:start + count, 1]
+            pool.prev_x[:count] = front.bullets[start:start + count, 2]
+            pool.alive[:count] = True
+            pool.alive[count:] = False
+            pool.free = list(range(pool.capacity - 1, count - 1, -1))
+            start += count
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            self.process.wait()
+        if self.memory is not None:
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def counts(self):
+        return {"enemies": self.enemy_count, "bullets": self.bullet_count}
+
+    def draw(self, screen, alpha=1.0):
+        self.draw_world(screen, alpha)
+        return self.draw_sprites(screen, alpha)
+
+    def draw_world(self, screen, alpha=1.0):
+        with self.profiler.stage("world.draw"):
+            self.world.draw(screen, self.camera, alpha)
+
+    def draw_sprites(self, screen, alpha=1.0):
+        if self.front is None:
+            return []
+        with self.profiler.stage("sprites.draw"):
+            queue = self.render_queue
+            offset = self.camera.offset(alpha)
+            for image, x, y, prev_x, prev_y in self.front.sprites[:self.front.get("sprites")].tolist():
+                queue.add("sprites", self.images[image], (round(prev_x + (x - prev_x) * alpha) - offset,
+                                                          round(prev_y + (y - prev_y) * alpha)))
+            self.bullets.draw(queue, self.camera, alpha=alpha)
+            self.enemy_bullets.draw(queue, self.camera, alpha=alpha)
+            return queue.flush(screen)
+
+def run_worker(memory_name, level_path, state, streaming, seed, waves):
+    from headless import init_headless
+    from game import GameSession
+
+    # Replies go to the real stdout, anything printed goes to stderr instead
+    output = os.fdopen(os.dup(sys.stdout.fileno()), "wb", buffering=0)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    # The main process owns the block and unlinks it
+    resource_tracker.unregister(memory._name, "shared_memory")
+    buffers = [SnapshotBuffer(memory.buf, i * SnapshotBuffer.SIZE) for i in range(2)]
+
+    init_headless()
+    session = GameSession(level_path or None, state=state, streaming=streaming, seed=seed, waves=waves)
+    image_index = {id(image): i for i, image in enumerate(animation_frames(SPRITE_SETS))}
+
+    buffers[0].write(session, image_index)
+    output.write(b"\0")
+    controls = sys.stdin.buffer
+    while True:
+        data = controls.read(1)
+        if not data:
+            break
+        session.step(Controls.unpack(data[0]))
+        buffers[session.tick % 2].write(session, image_index)
+        events = sum(1 << i for i, event in enumerate(EVENTS) if event in session.events)
+        output.write(bytes([events]))
+
+    del buffers
+    memory.close()
+
+if __name__ == "__main__":
+    name, level_path, state, streaming, seed, waves = sys.argv[1:]
+    run_worker(name, level_path, int(state), bool(int(streaming)), int(seed), bool(int(waves)))
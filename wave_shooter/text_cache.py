@@ -0,0 +1,38 @@
+import pygame
+from collections import OrderedDict
+
+class TextCache:
+    def __init__(self, size=128):
+        # Least recently used surfaces are dropped once there are more than size
+        self.size = size
+        self.surfaces = OrderedDict()
+
+    def get(self, key, make):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = self.surfaces[key] = make()
+            if len(self.surfaces) > self.size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def render(self, font, text, color, antialias=True):
+        return self.get((font, text, color, antialias), lambda: font.render(text, antialias, color))
+
+    def overlay(self, size, color, alpha):
+        def make():
+            surface = pygame.Surface(size)
+            surface.set_alpha(alpha)
+            surface.fill(color)
+            return surface
+        return self.get(("overlay", size, color, alpha), make)
+
+# Shared by the HUD, menus and overlays
+_cache = TextCache()
+
+def render_text(font, text, color, antialias=True):
+    return _cache.render(font, text, color, antialias)
+
+def overlay(size, color, alpha):
+    return _cache.overlay(size, color, alpha)
@@ -1,5 +1,6 @@
 import pygame
 from settings import *
+from text_cache import render_text, overlay
 
 class UpgradeMenu:
 
@@ -39,12 +40,9 @@ class UpgradeMenu:
             return
 
         # Dark overlay
-        overlay = pygame.Surface((WIDTH, HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill((0, 0, 0))
-        screen.blit(overlay, (0, 0))
+        screen.blit(overlay((WIDTH, HEIGHT), (0, 0, 0), 200), (0, 0))
 
-        title = self.big_font.render("UPGRADE MENU", True, WHITE)
+        title = render_text(self.big_font, "UPGRADE MENU", WHITE)
         screen.blit(title, (WIDTH // 2 - 180, 120))
 
         dj_text = "1 - Double Jump"
@@ -57,7 +55,7 @@ class UpgradeMenu:
 
         rh_text = "3 - Restore Health"
 
-        screen.blit(self.font.render(dj_text, True, WHITE), (WIDTH // 2 - 160, 220))
-        screen.blit(self.font.render(ds_text, True, WHITE), (WIDTH // 2 - 160, 270))
-        screen.blit(self.font.render(rh_text, True, WHITE), (WIDTH // 2 - 160, 320))
-        screen.blit(self.font.render("ESC - Resume", True, WHITE), (WIDTH // 2 - 160, 380))
\ No newline at end of file
+        screen.blit(render_text(self.font, dj_text, WHITE), (WIDTH // 2 - 160, 220))
+        screen.blit(render_text(self.font, ds_text, WHITE), (WIDTH // 2 - 160, 270))
+        screen.blit(render_text(self.font, rh_text, WHITE), (WIDTH // 2 - 160, 320))
+        screen.blit(render_text(self.font, "ESC - Resume", WHITE), (WIDTH // 2 - 160, 380))
\ No newline at end of file
@@ -0,0 +1,51 @@
+import random
+from settings import *
+
+class WaveDirector:
+    def __init__(self, first_delay=FPS * 5, interval=FPS * 20, base_size=3, growth=2, spawn_delay=FPS // 3,
+                 reach=WIDTH // 2, rng=random):
+        # Wave n brings base_size + growth * (n - 1) enemies, one every spawn_delay ticks, at
+        # spawn points just out of view (no further than reach from the edge of the screen)
+        self.first_delay = first_delay
+        self.interval = interval
+        self.base_size = base_size
+        self.growth = growth
+        self.spawn_delay = spawn_delay
+        self.reach = reach
+        self.rng = rng
+        self.reset()
+
+    def reset(self):
+        self.wave = 0
+        self.timer = self.first_delay
+        self.pending = 0
+        self.spawn_timer = 0
+
+    def wave_size(self, wave):
+        return self.base_size + self.growth * (wave - 1)
+
+    def update(self, camera, spawn_points, pool):
+        # Returns the positions to spawn an enemy at this tick
+        if self.pending == 0:
+            self.timer -= 1
+            if self.timer <= 0:
+                self.wave += 1
+                self.pending = self.wave_size(self.wave)
+                self.timer = self.interval
+                pool.reserve(self.pending)
+            return []
+
+        self.spawn_timer -= 1
+        if self.spawn_timer > 0:
+            return []
+
+        left = camera.scroll - self.reach
+        right = camera.scroll + camera.width + self.reach
+        points = [(x, y) for x, y in spawn_points
+                  if left <= x < camera.scroll - TILE_SIZE * 2 or camera.scroll + camera.width <= x < right]
+        if not points:
+            # Nowhere out of sight to spawn, try again next tick
+            return []
+        self.pending -= 1
+        self.spawn_timer = self.spawn_delay
+        return [self.rng.choice(points)]